@@ -1,13 +1,20 @@
 # Core pkgs
+import importlib
+
 import streamlit as st
-import streamlit.components.v1 as stc
 
-# Import Mini Apps
+from config import ADMIN, DIAGNOSTICS_LOG
+from instrumentation import enable_json_logs, rerun
+
+# Mini Apps, imported only when their menu entry is chosen so Home does not
+# pay for plotly, pandas, stats_can or matplotlib
 #from stock_app import run_stock_app
 #from stock_tsx import run_tsx_app
-from gdp import run_gdp_app
-from sim import run_sim_app
-from sim2 import run_sim2_app
+PAGES = {
+    "GDP": ("gdp", "run_gdp_app"),
+    "Simulation-1": ("sim", "run_sim_app"),
+    "Simulation-2": ("sim2", "run_sim2_app"),
+}
 
 
 HTML_BANNER = """
@@ -15,7 +22,12 @@ HTML_BANNER = """
     <h1 style="color:white;text-align:center;">National Output App</h1>
     </div>
     """
-stc.html(HTML_BANNER)
+# Rendered inline rather than in a components iframe, which costs an extra
+# frame and round trip on every full rerun
+st.markdown(HTML_BANNER, unsafe_allow_html=True)
+
+if DIAGNOSTICS_LOG:
+    enable_json_logs()
 
 def run_home_app():
     
@@ -43,16 +55,16 @@ def main():
     menu = ["Home","GDP","Simulation-1","Simulation-2"]
     choice = st.sidebar.selectbox("Menu",menu)
 
-    if choice == "Home":
-        run_home_app()
-    elif choice == "GDP":
-        run_gdp_app()
-    elif choice == "Simulation-1":
-        run_sim_app()
-    elif choice == "Simulation-2":
-        run_sim2_app()
-    else:
-        run_home_app()
+    with rerun(choice) as record:
+        if choice in PAGES:
+            module, entry = PAGES[choice]
+            getattr(importlib.import_module(module), entry)()
+        else:
+            run_home_app()
+
+    if ADMIN:
+        from diagnostics_view import render_diagnostics
+        render_diagnostics(record)
 
 
 if __name__ == '__main__':
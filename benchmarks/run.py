@@ -0,0 +1,137 @@
+# Offline benchmarks of the GDP pipeline and the simulation renders against a
+# synthetic StatsCan-shaped table.
+#
+#   python -m benchmarks.run --scale 1 --save main
+#   python -m benchmarks.run --scale 50 --compare main
+
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import write_table
+from forecast import fit_holt
+from gdp_figures import QUESTIONS, question_figures
+from gdp_data import TABLE_ID, parse_gdp_table
+from metrics import compute_metrics
+from panel import Panel
+from table_cache import product_id
+import sim
+import sim2
+
+
+BASELINE_DIR = pathlib.Path(__file__).parent / 'baselines'
+
+# A run is a regression when a stage is this much slower or hungrier than baseline
+TOLERANCE = 1.25
+
+
+def stages(zip_path):
+    # (name, callable) in pipeline order; each stage feeds from the previous ones
+    state = {}
+
+    def clean_data():
+        state['df'] = parse_gdp_table(zip_path)
+
+    def build_panel():
+        panel = Panel.from_frame(state['df'])
+        panel.metrics = compute_metrics(panel.values)
+        state['panel'] = panel
+
+    def filter_by_date():
+        state['window'] = state['panel'].window(pd.Timestamp('2000-01-01'), pd.Timestamp('2024-12-31'))
+
+    def question(q):
+        return lambda: question_figures(state['window'], q, state['panel'].components)
+
+    result = [('clean_data', clean_data), ('build_panel', build_panel), ('filter_by_date', filter_by_date)]
+    result += [(f'question_{q[0]}', question(q)) for q in QUESTIONS]
+    result += [('forecast_fit', lambda: fit_holt(state['panel'].values, max_workers=1))]
+    # __wrapped__ skips the render caches so every call really draws
+    result += [('sim_render', lambda: sim.render_equilibrium.__wrapped__(100, 0.5, 20, 50, 50, 50)),
+               ('sim2_render', lambda: sim2.render_equilibrium.__wrapped__(50, 0.75, 0.25, 50, 50, 100, 0.1)),
+               ('sim2_savings_render', lambda: sim2.render_savings_investment.__wrapped__(50, 0.75, 0.25, 50, 50))]
+    return result
+
+
+def measure(fn, repeat):
+    # Best wall time over `repeat` untraced runs, then one traced run for the
+    # peak of traced memory and the number of allocations it left behind
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'filename'))
+    return {'seconds': min(times), 'peak_bytes': peak, 'allocations': allocations}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    regressions = []
+    for name, now in results.items():
+        then = baseline.get(name)
+        if then is None:
+            continue
+        for key in ('seconds', 'peak_bytes'):
+            if then[key] and now[key] > then[key] * tolerance:
+                regressions.append(f"{name}: {key} {then[key]:.4g} -> {now[key]:.4g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GDP pipeline and simulation renders.")
+    parser.add_argument('--scale', type=float, default=1, help="table size relative to the real one")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', help="reuse or keep the generated table here")
+    parser.add_argument('--save', metavar='NAME', help="store results as baselines/NAME.json")
+    parser.add_argument('--compare', metavar='NAME', help="fail on regressions against baselines/NAME.json")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="slowdown or memory growth ratio counted as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = pathlib.Path(args.data_dir or tmp)
+        zip_path = folder / (product_id(TABLE_ID) + '-eng.zip')
+        if not zip_path.is_file():
+            rows = write_table(folder, scale=args.scale)
+            print(f"generated {rows:,} rows in {zip_path}")
+
+        results = {}
+        print(f"{'stage':<22}{'seconds':>10}{'peak MiB':>12}{'allocations':>14}")
+        for name, fn in stages(zip_path):
+            results[name] = measure(fn, args.repeat)
+            r = results[name]
+            print(f"{name:<22}{r['seconds']:>10.4f}{r['peak_bytes'] / 2**20:>12.2f}{r['allocations']:>14,}")
+
+    report = {'scale': args.scale, 'stages': results}
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        with open(BASELINE_DIR / (args.save + '.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(BASELINE_DIR / (args.compare + '.json')) as f:
+            baseline = json.load(f)
+        if baseline['scale'] != args.scale:
+            print(f"warning: baseline was taken at scale {baseline['scale']}")
+        regressions = compare(results, baseline['stages'], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
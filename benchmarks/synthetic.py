@@ -0,0 +1,77 @@
+import io
+import json
+import pathlib
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from gdp_data import COMPONENTS, TABLE_ID
+from table_cache import product_id
+
+
+# Dimensions of 36-10-0104-01 besides the estimates themselves
+PRICES = ['Current prices', 'Chained (2012) dollars', '2012 constant prices', 'Implicit price indexes']
+SEASONAL_ADJUSTMENT = ['Unadjusted', 'Seasonally adjusted at quarterly rates',
+                       'Seasonally adjusted at annual rates']
+
+# Estimates in the real table that the GDP page filters out; with the page's
+# components and the dimensions above they give about 130k rows at scale 1
+OTHER_ESTIMATES = 35
+
+COLUMNS = ['REF_DATE', 'GEO', 'DGUID', 'Prices', 'Seasonal adjustment', 'Estimates', 'UOM',
+           'UOM_ID', 'SCALAR_FACTOR', 'SCALAR_ID', 'VECTOR', 'COORDINATE', 'VALUE', 'STATUS',
+           'SYMBOL', 'TERMINATED', 'DECIMALS']
+
+
+def estimates(scale=1):
+    # The page's components plus filler estimates; `scale` multiplies the
+    # filler, which is what grows the table towards tens of millions of rows
+    extra = int(round(OTHER_ESTIMATES * scale))
+    return COMPONENTS + [f'Synthetic estimate {i}' for i in range(extra)]
+
+
+def quarters(start='1961Q1', end='2024Q2'):
+    return pd.period_range(start, end, freq='Q').to_timestamp().strftime('%Y-%m').tolist()
+
+
+def _chunks(dates, names, seed):
+    # One block of rows per date, walking every series forward by a random step
+    rng = np.random.default_rng(seed)
+    combos = [(p, s, e) for p in PRICES for s in SEASONAL_ADJUSTMENT for e in names]
+    prices, adjustments, names_col = (np.array(c, dtype=object) for c in zip(*combos))
+    uom = np.where(prices == 'Implicit price indexes', '2012=100', 'Dollars')
+    uom_id = np.where(prices == 'Implicit price indexes', 17, 81)
+    vectors = np.array([f'v{62_300_000 + i}' for i in range(len(combos))], dtype=object)
+    coordinates = np.array([f'1.{i % 4 + 1}.{i % 3 + 1}.{i // 12 + 1}' for i in range(len(combos))], dtype=object)
+    level = rng.uniform(1e4, 1e6, len(combos))
+    for date in dates:
+        level = level * (1 + rng.normal(0.005, 0.01, len(combos)))
+        yield pd.DataFrame({
+            'REF_DATE': date, 'GEO': 'Canada', 'DGUID': '2016A000011124',
+            'Prices': prices, 'Seasonal adjustment': adjustments, 'Estimates': names_col,
+            'UOM': uom, 'UOM_ID': uom_id, 'SCALAR_FACTOR': 'millions', 'SCALAR_ID': 6,
+            'VECTOR': vectors, 'COORDINATE': coordinates, 'VALUE': level.round(1),
+            'STATUS': '', 'SYMBOL': '', 'TERMINATED': '', 'DECIMALS': 1,
+        }, columns=COLUMNS)
+
+
+def write_table(folder, scale=1, dates=None, release='2024-08-30T08:30', seed=0):
+    # Write "<pid>-eng.zip" and "<pid>.json" the way StatsCan serves them, so
+    # table_cache.FixtureDownloader can read the folder. Rows are streamed
+    # into the archive one date at a time. Returns the number of rows.
+    folder = pathlib.Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    pid = product_id(TABLE_ID)
+    rows = 0
+    with zipfile.ZipFile(folder / (pid + '-eng.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(pid + '.csv', 'w', force_zip64=True) as raw, \
+                io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+            header = True
+            for chunk in _chunks(dates or quarters(), estimates(scale), seed):
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+                rows += len(chunk)
+    with open(folder / (pid + '.json'), 'w') as f:
+        json.dump({'productId': pid, 'releaseTime': release}, f)
+    return rows
@@ -0,0 +1,180 @@
+# Batch jobs over the same data and models as the app, without Streamlit.
+#
+#   python cli.py metrics --tables gdp cpi --out reports/ --format parquet
+#   python cli.py equilibria --model proportional --range c1=0:0.9:10 \
+#       --set c0=50 tax_rate=0.25 I=50 G=50 X=100 M1=0.1 --out equilibria.csv
+#   python cli.py equilibria --model lump_sum --input configs.csv --out equilibria.parquet
+#   python cli.py snapshot --fixtures data/ --root snapshots/
+
+import argparse
+import json
+import multiprocessing
+import pathlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+FORMATS = ('csv', 'parquet')
+
+
+def write_frame(df, path):
+    # By extension: .parquet, anything else is CSV
+    if path.suffix == '.parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def metric_frames(panel):
+    # Long frames of a panel with its metrics: one row per (date, component)
+    # with every per-component metric as a column, and one frame per
+    # correlation stack with a row per observed (date, component, other)
+    import numpy as np
+    import pandas as pd
+
+    n, k = panel.values.shape
+    names = np.array(panel.components, dtype=object)
+    levels = {name: m for name, m in panel.metrics.items() if m.ndim == 2}
+    df = pd.DataFrame({'date': np.repeat(panel.dates, k), 'component': np.tile(names, n),
+                       'value': panel.values.ravel(),
+                       **{name: m.ravel() for name, m in levels.items()}})
+    frames = {'metrics': df.loc[df['value'].notna()]}
+    for name, stack in panel.metrics.items():
+        if stack.ndim == 3:
+            df = pd.DataFrame({'date': np.repeat(panel.dates, k * k),
+                               'component': np.tile(np.repeat(names, k), n),
+                               'other': np.tile(names, n * k),
+                               'correlation': stack.ravel()})
+            frames[name] = df.loc[df['correlation'].notna()]
+    return frames
+
+
+def table_metrics(name, df, out_dir, fmt):
+    # Panel and metrics of one cleaned table, written as <name>-<frame>.<fmt>
+    from datasets import REGISTRY
+    from metrics import compute_metrics
+    from panel import Panel
+
+    panel = Panel.from_frame(df)
+    panel.metrics = compute_metrics(panel.values, REGISTRY[name].periods_per_year)
+    paths = []
+    for frame, data in metric_frames(panel).items():
+        path = pathlib.Path(out_dir) / f'{name}-{frame}.{fmt}'
+        write_frame(data, path)
+        paths.append(path.name)
+    return name, paths
+
+
+def run_metrics(args):
+    from datasets import load_datasets
+    from table_cache import read_manifest
+
+    out_dir = pathlib.Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Fetching is network bound and shares threads; metrics are CPU bound
+    # and get a process each
+    frames = load_datasets(args.tables, cache_dir=args.cache_dir, max_workers=args.workers or 4)
+    manifest = {}
+    if len(frames) > 1 and args.workers != 1:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+            futures = [pool.submit(table_metrics, name, df, out_dir, args.format) for name, df in frames.items()]
+            results = [future.result() for future in futures]
+    else:
+        results = [table_metrics(name, df, out_dir, args.format) for name, df in frames.items()]
+    for name, paths in results:
+        manifest[name] = {'release': read_manifest(name, args.cache_dir)['release'], 'files': paths}
+        print(f"{name:<16} {manifest[name]['release']}  {', '.join(paths)}")
+    with open(out_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return 0
+
+
+def parse_assignments(items, parser, ranges=False):
+    # ["c1=0.5"] -> {'c1': 0.5}; with ranges, ["c1=0:0.9:10"] -> {'c1': (0, 0.9, 10)}
+    values = {}
+    for item in items:
+        name, _, value = item.partition('=')
+        try:
+            if ranges:
+                lo, hi, n = value.split(':')
+                values[name] = (float(lo), float(hi), int(n))
+            else:
+                values[name] = float(value)
+        except ValueError:
+            parser.error(f"cannot parse {item!r}")
+    return values
+
+
+def run_equilibria(args, parser):
+    import numpy as np
+    import pandas as pd
+
+    from sweep import MODELS, run_batch
+
+    params = MODELS[args.model][0]
+    rows = pd.read_csv(args.input) if args.input else pd.DataFrame(index=[0])
+    for name, value in parse_assignments(args.set, parser).items():
+        rows[name] = value
+    # every row of the input (or the --set values) at every point of each range
+    for name, (lo, hi, n) in parse_assignments(args.range, parser, ranges=True).items():
+        rows = rows.drop(columns=name, errors='ignore').merge(
+            pd.DataFrame({name: np.linspace(lo, hi, n)}), how='cross')
+    missing = [name for name in params if name not in rows]
+    if missing:
+        parser.error(f"no value for {', '.join(missing)}; give them with --set, --range or --input")
+
+    results = run_batch(args.model, {name: rows[name].to_numpy() for name in params},
+                        max_workers=args.workers)
+    out = pd.concat([rows[list(params)].reset_index(drop=True), pd.DataFrame(results)], axis=1)
+    write_frame(out, pathlib.Path(args.out))
+    print(f"{len(out):,} rows -> {args.out}")
+    return 0
+
+
+def run_snapshot(args):
+    from snapshot import build_snapshots
+    from table_cache import FixtureDownloader
+
+    downloader = FixtureDownloader(args.fixtures) if args.fixtures else None
+    for name, folder in build_snapshots(args.tables, downloader, args.cache_dir, args.root).items():
+        print(f"{name:<16} -> {folder}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute GDP metrics and model equilibria to files.")
+    parser.add_argument('--workers', type=int, default=None, help="processes to use (default: one per CPU)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    metrics = commands.add_parser('metrics', help="panel metrics of registered StatsCan tables")
+    metrics.add_argument('--tables', nargs='+', default=None, help="registered table names (default: all)")
+    metrics.add_argument('--out', default='reports', help="output folder")
+    metrics.add_argument('--format', choices=FORMATS, default='csv')
+    metrics.add_argument('--cache-dir', default=None, help="table snapshot folder (default: MACRO_CACHE_DIR)")
+
+    equilibria = commands.add_parser('equilibria', help="equilibria and multipliers for many configurations")
+    equilibria.add_argument('--model', choices=('lump_sum', 'proportional'), default='proportional')
+    equilibria.add_argument('--input', help="CSV with one configuration per row, parameters as columns")
+    equilibria.add_argument('--set', nargs='+', default=[], metavar='NAME=VALUE', help="fixed parameters")
+    equilibria.add_argument('--range', nargs='+', default=[], metavar='NAME=LOW:HIGH:POINTS',
+                            help="parameters to sweep; rows are the product of all ranges")
+    equilibria.add_argument('--out', required=True, help="output file, .csv or .parquet")
+
+    snapshot = commands.add_parser('snapshot', help="build memory-mappable snapshots for the app")
+    snapshot.add_argument('--tables', nargs='+', default=None, help="registered table names (default: all)")
+    snapshot.add_argument('--root', default=None, help="snapshot folder (default: MACRO_SNAPSHOT_DIR)")
+    snapshot.add_argument('--fixtures', default=None,
+                          help="read <pid>-eng.zip and <pid>.json from this folder instead of StatsCan")
+    snapshot.add_argument('--cache-dir', default=None, help="table snapshot folder (default: MACRO_CACHE_DIR)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'metrics':
+        return run_metrics(args)
+    if args.command == 'snapshot':
+        return run_snapshot(args)
+    return run_equilibria(args, parser)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import os
+import pathlib
+
+
+# Where cleaned table snapshots, sweeps and other derived files live;
+# override with MACRO_CACHE_DIR
+CACHE_DIR = pathlib.Path(os.environ.get("MACRO_CACHE_DIR", ".cache/statscan"))
+
+# Serve StatsCan tables from "<pid>-eng.zip" and "<pid>.json" files in this
+# folder instead of the web service, e.g. for offline runs and tests
+FIXTURE_DIR = os.environ.get("MACRO_FIXTURE_DIR")
+
+# MACRO_ADMIN=1 shows the diagnostics panel in the sidebar;
+# MACRO_DIAGNOSTICS_LOG=1 writes one JSON line per script run to stderr
+ADMIN = os.environ.get("MACRO_ADMIN") == "1"
+DIAGNOSTICS_LOG = os.environ.get("MACRO_DIAGNOSTICS_LOG") == "1"
+
+# Deploy-time snapshots built by `python cli.py snapshot`; when one exists
+# the app memory-maps it instead of fetching and parsing; override with
+# MACRO_SNAPSHOT_DIR
+SNAPSHOT_DIR = pathlib.Path(os.environ.get("MACRO_SNAPSHOT_DIR", "snapshots"))
+
+# Whether simulation inputs apply on every change (MACRO_LIVE_UPDATES=1) or,
+# by default, are batched behind an Apply button so a burst of slider moves
+# costs one rerun; users can tick "Update while adjusting" in the sidebar
+LIVE_UPDATES = os.environ.get("MACRO_LIVE_UPDATES", "0") == "1"
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+# Fewest overlapping observations a correlation is reported from
+MIN_PERIODS = 3
+
+
+def _windowed(cumulative, window):
+    # Sums over the trailing `window` rows from cumulative sums (with a
+    # leading zero row); expanding sums when window is None
+    if window is None:
+        return cumulative[1:]
+    out = np.full(cumulative[1:].shape, np.nan)
+    if len(cumulative) > window:
+        out[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return out
+
+
+def rolling_correlation(values, window=None):
+    # Component x component correlation for every row of `values` (dates x
+    # components), over the trailing `window` rows or, when window is None,
+    # over all rows so far. Pairs use the rows where both are observed.
+    # Running sums of x, y, x^2, y^2 and xy are built with one cumsum each,
+    # so every window position costs O(k^2) instead of a .corr() call.
+    # Returns an array of shape (dates, components, components).
+    x = values - np.nanmean(values, axis=0)  # centring keeps the sums well conditioned
+    observed = np.isfinite(x)
+    x = np.where(observed, x, 0.0)
+
+    pair = (observed[:, :, None] & observed[:, None, :]).astype('float64')
+    xi = x[:, :, None] * pair
+    xj = x[:, None, :] * pair
+    terms = {'n': pair, 'sx': xi, 'sy': xj,
+             'sxx': xi * x[:, :, None], 'syy': xj * x[:, None, :], 'sxy': xi * x[:, None, :]}
+    zero = np.zeros((1,) + pair.shape[1:])
+    sums = {name: _windowed(np.concatenate([zero, np.cumsum(t, axis=0)]), window)
+            for name, t in terms.items()}
+
+    n = sums['n']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sums['sxy'] - sums['sx'] * sums['sy'] / n
+        var_x = sums['sxx'] - sums['sx'] ** 2 / n
+        var_y = sums['syy'] - sums['sy'] ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[~(n >= MIN_PERIODS)] = np.nan
+    return np.clip(corr, -1, 1)
@@ -0,0 +1,137 @@
+import dataclasses
+import functools
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from ingest import read_filtered_zip
+from table_cache import load_table, product_id
+
+
+# Tables fetched at the same time; each one is mostly network wait and CSV parsing
+MAX_WORKERS = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class TableSpec:
+    # One StatsCan table as the app uses it: rows matching `filters`
+    # ({dimension: value}) and `members` ({dimension: allowed values}),
+    # reduced to the dimensions in `columns` ({dimension: column name}),
+    # published `periods_per_year` times a year
+    name: str
+    table_id: str
+    filters: dict
+    columns: dict
+    members: dict = dataclasses.field(default_factory=dict)
+    periods_per_year: int = 4
+
+
+GDP = TableSpec(
+    name='gdp',
+    table_id='36-10-0104-01',
+    filters={'Seasonal adjustment': 'Seasonally adjusted at annual rates',
+             'Prices': 'Chained (2012) dollars',
+             'UOM': 'Dollars'},
+    columns={'REF_DATE': 'date', 'Estimates': 'component', 'VALUE': 'value'},
+    members={'Estimates': ['Final consumption expenditure',
+                           'Gross fixed capital formation',
+                           'Investment in inventories',
+                           'Exports of goods and services',
+                           'Less: imports of goods and services',
+                           'Statistical discrepancy',
+                           'Gross domestic product at market prices',
+                           'Final domestic demand']},
+    periods_per_year=4,
+)
+
+CPI = TableSpec(
+    name='cpi',
+    table_id='18-10-0004-01',
+    filters={'GEO': 'Canada'},
+    columns={'REF_DATE': 'date', 'Products and product groups': 'component', 'VALUE': 'value'},
+    members={'Products and product groups': ['All-items',
+                                             'Food',
+                                             'Shelter',
+                                             'Household operations, furnishings and equipment',
+                                             'Clothing and footwear',
+                                             'Transportation',
+                                             'Health and personal care',
+                                             'Recreation, education and reading',
+                                             'All-items excluding food and energy',
+                                             'Energy']},
+    periods_per_year=12,
+)
+
+LABOUR_FORCE = TableSpec(
+    name='labour_force',
+    table_id='14-10-0287-01',
+    filters={'GEO': 'Canada',
+             'Gender': 'Total - Gender',
+             'Age group': '15 years and over',
+             'Statistics': 'Estimate',
+             'Data type': 'Seasonally adjusted'},
+    columns={'REF_DATE': 'date', 'Labour force characteristics': 'component', 'VALUE': 'value'},
+    members={'Labour force characteristics': ['Population',
+                                              'Labour force',
+                                              'Employment',
+                                              'Full-time employment',
+                                              'Part-time employment',
+                                              'Unemployment',
+                                              'Unemployment rate',
+                                              'Participation rate',
+                                              'Employment rate']},
+    periods_per_year=12,
+)
+
+PROVINCIAL_GDP = TableSpec(
+    name='provincial_gdp',
+    table_id='36-10-0402-01',
+    filters={'Value': 'Chained (2017) dollars',
+             'North American Industry Classification System (NAICS)': 'All industries [T001]'},
+    columns={'REF_DATE': 'date', 'GEO': 'component', 'VALUE': 'value'},
+    members={'GEO': ['Canada',
+                     'Newfoundland and Labrador',
+                     'Prince Edward Island',
+                     'Nova Scotia',
+                     'New Brunswick',
+                     'Quebec',
+                     'Ontario',
+                     'Manitoba',
+                     'Saskatchewan',
+                     'Alberta',
+                     'British Columbia',
+                     'Yukon',
+                     'Northwest Territories',
+                     'Nunavut']},
+    periods_per_year=1,
+)
+
+REGISTRY = {spec.name: spec for spec in (GDP, CPI, LABOUR_FORCE, PROVINCIAL_GDP)}
+
+
+def parse_table(spec, zip_path):
+    return read_filtered_zip(zip_path, product_id(spec.table_id) + '.csv',
+                             rename=spec.columns, filters=spec.filters, members=spec.members)
+
+
+def fingerprint(spec):
+    # Stable hash of everything in the spec, stored with the cached table so
+    # editing a spec's filters, members or columns refetches it
+    return hashlib.sha1(json.dumps(dataclasses.asdict(spec), sort_keys=True).encode()).hexdigest()
+
+
+def load_dataset(spec, downloader=None, cache_dir=None):
+    # One cleaned table, cached on disk under the spec's name
+    return load_table(spec.table_id, functools.partial(parse_table, spec),
+                      downloader=downloader, cache_dir=cache_dir, key=spec.name,
+                      fingerprint=fingerprint(spec))
+
+
+def load_datasets(names=None, downloader=None, cache_dir=None, max_workers=MAX_WORKERS):
+    # Fetch and clean several registered tables at once on a bounded thread
+    # pool, so a refresh takes about as long as the slowest table.
+    # Returns {name: DataFrame}; the first failure is raised once all finish.
+    specs = [REGISTRY[name] for name in (names or REGISTRY)]
+    with ThreadPoolExecutor(min(max_workers, len(specs)) or 1) as pool:
+        futures = {spec.name: pool.submit(load_dataset, spec, downloader, cache_dir) for spec in specs}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,19 @@
+import streamlit as st
+
+from instrumentation import cache_stats
+
+
+def render_diagnostics(record):
+    # Admin-only sidebar panel for the run that just finished
+    with st.sidebar.expander("Diagnostics"):
+        st.caption(f"{record['page']}: {record['seconds'] * 1000:.0f} ms, "
+                   f"RSS {record['rss_delta_bytes'] / 2**20:+.1f} MiB")
+        st.dataframe([{"stage": s["name"], "ms": round(s["seconds"] * 1000, 1)} for s in record["spans"]],
+                     hide_index=True)
+        st.caption("This run's caches")
+        st.dataframe([{"cache": name, **counts} for name, counts in record["caches"].items()],
+                     hide_index=True)
+        st.caption("Process totals")
+        st.dataframe([{"cache": name, "hits": c["hits"], "misses": c["misses"],
+                       "hit rate": round(c["hit_rate"], 3)} for name, c in cache_stats().items()],
+                     hide_index=True)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from model import proportional_equilibrium
+
+
+# Fan-chart bands reported by monte_carlo
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+SHOCK_TARGETS = ('I', 'G', 'X')
+
+
+def shock_path(size, start, periods, duration=None):
+    # Additive shock of `size` from period `start`, lasting `duration`
+    # periods, or for good when duration is None
+    path = np.zeros(periods + 1)
+    stop = None if duration is None else start + duration
+    path[start:stop] = size
+    return path
+
+
+def simulate_path(c0, c1, tax_rate, I, G, X, M1, periods, shocks=None, y0=None):
+    # Period-by-period version of the sim2.py model: output follows last
+    # period's aggregate demand, Y_t = c0 + I_t + G_t + X_t + b*Y_{t-1}
+    # with b = (c1 - M1)*(1 - tax_rate). `shocks` maps 'I', 'G' or 'X' to
+    # additive paths of length periods + 1. Starts from the unshocked
+    # equilibrium unless y0 is given; returns Y_0 .. Y_periods.
+    b = (c1 - M1) * (1 - tax_rate)
+    autonomous = np.full(periods + 1, float(c0 + I + G + X))
+    for path in (shocks or {}).values():
+        autonomous = autonomous + path
+    if y0 is None:
+        y0 = proportional_equilibrium(c0, c1, tax_rate, I, G, X, M1)['C + I + G + NX']
+    y = np.empty(periods + 1)
+    y[0] = y0
+    for t in range(1, periods + 1):
+        y[t] = autonomous[t] + b * y[t - 1]
+    return y
+
+
+def monte_carlo(c0, c1, tax_rate, I, G, X, M1, periods, paths, sigma, persistence=0.0,
+                quantiles=QUANTILES, seed=None, shocks=None):
+    # Propagate `paths` simulations at once. Each of I, G and X gets an AR(1)
+    # shock e_t = persistence*e_{t-1} + sigma[name]*z_t on top of the
+    # deterministic `shocks`. With a shared persistence their sum is itself
+    # AR(1) with the root-sum-square sigma, so one draw per path and period
+    # covers all three. Only the current period of every path is kept, so
+    # memory grows with the number of paths, not paths x periods.
+    # Returns {'quantiles': (len(quantiles), periods + 1), 'mean': (periods + 1,)}.
+    rng = np.random.default_rng(seed)
+    b = (c1 - M1) * (1 - tax_rate)
+    autonomous = np.full(periods + 1, float(c0 + I + G + X))
+    for path in (shocks or {}).values():
+        autonomous = autonomous + path
+    scale = np.sqrt(sum(sigma.get(name, 0.0) ** 2 for name in SHOCK_TARGETS))
+
+    y = np.full(paths, proportional_equilibrium(c0, c1, tax_rate, I, G, X, M1)['C + I + G + NX'])
+    noise = np.zeros(paths)
+    bands = np.empty((len(quantiles), periods + 1))
+    mean = np.empty(periods + 1)
+    bands[:, 0], mean[0] = y[0], y[0]
+    for t in range(1, periods + 1):
+        noise *= persistence
+        noise += rng.standard_normal(paths) * scale
+        y = autonomous[t] + noise + b * y
+        bands[:, t] = np.quantile(y, quantiles)
+        mean[t] = y.mean()
+    return {'quantiles': bands, 'mean': mean}
@@ -0,0 +1,85 @@
+import streamlit as st
+from matplotlib.figure import Figure
+import numpy as np
+
+from dynamics import QUANTILES, SHOCK_TARGETS, monte_carlo, shock_path, simulate_path
+from instrumentation import span, track_cache
+from plotting import apply_style, png_bytes
+
+
+SHOCK_LABELS = {'I': 'Investment (I)', 'G': 'Government Spending (G)', 'X': 'Exports (X)'}
+
+
+# Quantile paths are a few hundred floats, so every session shares them
+@track_cache("monte_carlo", st.cache_data(max_entries=32))
+def load_fan(params, periods, paths, sigma, persistence, target, size, start, duration, seed):
+    shocks = {target: shock_path(size, start, periods, duration)}
+    return monte_carlo(*params, periods, paths, dict(sigma), persistence, seed=seed, shocks=shocks)
+
+
+def render_dynamics(c0, c1, tax_rate, I, G, X, M1):
+    params = (c0, c1, tax_rate, I, G, X, M1)
+    b = (c1 - M1) * (1 - tax_rate)
+    if not abs(b) < 1:
+        st.warning("The time path never settles: (C1 - M1) x (1 - tax rate) must be below one.")
+        return
+
+    cols = st.columns(3)
+    target = cols[0].selectbox("Shock to", SHOCK_TARGETS, format_func=SHOCK_LABELS.get, index=1, key='shock_target')
+    size = cols[1].number_input("Shock size", -200, 200, 20, key='shock_size')
+    kind = cols[2].radio("Shock lasts", ["Temporary", "Permanent"], key='shock_kind')
+    cols = st.columns(3)
+    periods = cols[0].slider("Periods", 10, 200, 40, key='periods')
+    start = cols[1].slider("Shock starts in period", 1, periods, min(5, periods), key='shock_start')
+    duration = None
+    if kind == "Temporary":
+        duration = cols[2].slider("Shock lasts (periods)", 1, periods, min(4, periods), key='shock_duration')
+
+    with span("simulate_path"):
+        baseline = simulate_path(*params, periods)
+        shocked = simulate_path(*params, periods, shocks={target: shock_path(size, start, periods, duration)})
+    apply_style()
+    t = np.arange(periods + 1)
+
+    fig = Figure(figsize=(12, 5))
+    ax = fig.subplots()
+    ax.plot(t, baseline, label='No shock', linestyle='--', color='k')
+    ax.plot(t, shocked, label=f'{SHOCK_LABELS[target]} shock')
+    ax.axvline(start, color='grey', linewidth=0.8)
+    ax.set_xlabel('Period')
+    ax.set_ylabel('Income / Output (Y)')
+    ax.set_title('Dynamic multiplier: Y(t) = C0 + I + G + X + (C1 - M1)(1 - tax rate) Y(t-1)')
+    ax.legend()
+    ax.grid(True)
+    with span("render"):
+        png = png_bytes(fig)
+    st.image(png)
+    response = shocked - baseline
+    st.write(f"Peak response {response[np.argmax(np.abs(response))]:.1f}, "
+             f"long-run multiplier {1 / (1 - b):.2f}")
+
+    st.markdown("**Monte Carlo**: random AR(1) shocks to I, G and X on top of the shock above.")
+    cols = st.columns(4)
+    paths = cols[0].number_input("Paths", 1_000, 1_000_000, 10_000, step=1_000, key='mc_paths')
+    sigma = cols[1].number_input("Shock std. dev.", 0.0, 100.0, 5.0, key='mc_sigma')
+    persistence = cols[2].slider("Persistence", 0.0, 0.95, 0.5, key='mc_persistence')
+    seed = cols[3].number_input("Seed", 0, 2**31 - 1, 0, key='mc_seed')
+
+    with span("monte_carlo"):
+        fan = load_fan(params, periods, paths, tuple((name, sigma) for name in SHOCK_TARGETS),
+                       persistence, target, size, start, duration, seed)
+    bands = dict(zip(QUANTILES, fan['quantiles']))
+    fig = Figure(figsize=(12, 5))
+    ax = fig.subplots()
+    ax.fill_between(t, bands[0.05], bands[0.95], alpha=0.2, color='b', label='5-95%')
+    ax.fill_between(t, bands[0.25], bands[0.75], alpha=0.4, color='b', label='25-75%')
+    ax.plot(t, bands[0.5], color='b', label='Median')
+    ax.plot(t, shocked, color='k', linestyle='--', label='No random shocks')
+    ax.set_xlabel('Period')
+    ax.set_ylabel('Income / Output (Y)')
+    ax.set_title(f'Fan chart over {paths:,} paths')
+    ax.legend()
+    ax.grid(True)
+    with span("render_fan"):
+        png = png_bytes(fig)
+    st.image(png)
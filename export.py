@@ -0,0 +1,161 @@
+import io
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from lru import SizedLRU
+
+
+# format -> (mime type, file extension)
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+}
+
+# Dates written per chunk, and the total size of finished files kept in memory
+CHUNK_DATES = 2_000
+CACHE_BYTES = 64 * 2**20
+
+# Encoded output stays in memory up to this size, then spills to a temp file
+SPOOL_BYTES = 8 * 2**20
+
+
+def iter_chunks(window, components, chunk_dates=CHUNK_DATES):
+    # Long (date, component, value) frames over the window, a block of dates at a time
+    columns = [window.column(c) for c in components]
+    names = np.array(components, dtype=object)
+    for start in range(0, len(window.dates), chunk_dates):
+        values = window.values[start:start + chunk_dates, columns]
+        dates = window.dates[start:start + chunk_dates]
+        df = pd.DataFrame({'date': np.repeat(dates, len(columns)),
+                           'component': np.tile(names, len(dates)),
+                           'value': values.ravel()})
+        yield df.loc[df['value'].notna()]
+
+
+def write_csv(chunks, f):
+    # Each chunk is encoded here rather than through io.TextIOWrapper, which
+    # needs readable() and friends that SpooledTemporaryFile lacks before 3.11
+    header = True
+    for df in chunks:
+        f.write(df.to_csv(index=False, header=header, date_format='%Y-%m-%d').encode('utf-8'))
+        header = False
+    if header:
+        f.write(b'date,component,value\n')
+
+
+def write_parquet(chunks, f):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([('date', pa.timestamp('ns')), ('component', pa.string()), ('value', pa.float64())])
+    with pq.ParquetWriter(f, schema) as writer:
+        for df in chunks:
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>',
+    '_rels/.rels':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>',
+    'xl/workbook.xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="data" sheetId="1" r:id="rId1"/></sheets></workbook>',
+    'xl/_rels/workbook.xml.rels':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>',
+    # style 1 is the built-in short date format
+    'xl/styles.xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>',
+}
+
+# Excel stores dates as days since 1899-12-30
+_EXCEL_EPOCH = np.datetime64('1899-12-30', 'D')
+
+
+def write_xlsx(chunks, f):
+    # A one-sheet workbook written straight into the zip, the sheet XML
+    # streamed a chunk at a time
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_PARTS.items():
+            archive.writestr(name, xml)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as raw:
+            sheet = io.TextIOWrapper(raw, encoding='utf-8')
+            sheet.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        '<sheetData><row r="1"><c t="inlineStr"><is><t>date</t></is></c>'
+                        '<c t="inlineStr"><is><t>component</t></is></c>'
+                        '<c t="inlineStr"><is><t>value</t></is></c></row>')
+            row = 1
+            for df in chunks:
+                serials = (df['date'].to_numpy().astype('datetime64[D]') - _EXCEL_EPOCH).astype(int)
+                lines = []
+                for serial, component, value in zip(serials.tolist(), df['component'], df['value'].tolist()):
+                    row += 1
+                    lines.append(f'<row r="{row}"><c s="1"><v>{serial}</v></c>'
+                                 f'<c t="inlineStr"><is><t>{escape(component)}</t></is></c>'
+                                 f'<c><v>{value!r}</v></c></row>')
+                sheet.write(''.join(lines))
+            sheet.write('</sheetData></worksheet>')
+            sheet.flush()
+            sheet.detach()
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'xlsx': write_xlsx}
+
+
+_cache = SizedLRU("export", CACHE_BYTES)
+
+
+def export_key(table, window, components, fmt):
+    return (table, tuple(sorted(components)), *window.bounds(), fmt)
+
+
+def export(table, window, components, fmt, cache=_cache):
+    # Encoded bytes of the selected components over a date window. `table`
+    # names the data and its vintage. Output is written chunk by chunk to a
+    # spooled file and read back once, so a large file is never held twice
+    # while it is being encoded.
+    key = export_key(table, window, components, fmt)
+    components = [c for c in window.components if c in set(components)]
+    data = cache.get(key)
+    if data is None:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as f:
+            WRITERS[fmt](iter_chunks(window, components), f)
+            f.seek(0)
+            data = f.read()
+        cache.put(key, data)
+    return data
+
+
+def file_name(stem, fmt):
+    return stem + FORMATS[fmt][1]
@@ -0,0 +1,100 @@
+import numpy as np
+
+from parallel import map_chunks
+
+
+# Smoothing weights searched for every component: level (alpha) and trend (beta)
+ALPHAS = np.linspace(0.05, 1.0, 20)
+BETAS = np.linspace(0.0, 0.5, 11)
+
+# Components fitted per worker once a panel is wide enough to spread out
+COLUMNS_PER_TASK = 64
+
+# Two-sided bands of the fan chart, with their normal quantiles
+COVERAGE = {0.5: 0.6745, 0.8: 1.2816, 0.95: 1.9600}
+
+
+def _initial_state(values):
+    # Level at each column's first observation and the first observed change
+    # as its trend; `first` is the row of that observation
+    observed = np.isfinite(values)
+    first = np.argmax(observed, axis=0)
+    columns = np.arange(values.shape[1])
+    level = values[first, columns]
+    second = np.minimum(first + 1, len(values) - 1)
+    trend = np.nan_to_num(values[second, columns] - level)
+    return first, level, trend
+
+
+def _fit_block(values, alphas, betas):
+    # Holt's linear trend for every (alpha, beta) pair and every column in one
+    # pass over time: states are (pairs, columns) arrays, so the search costs
+    # one vector update per date. Gaps keep projecting the trend and add no
+    # error. Returns the best pair per column and its final state.
+    alpha, beta = (a.ravel()[:, None] for a in np.meshgrid(alphas, betas, indexing='ij'))
+    first, level0, trend0 = _initial_state(values)
+    pairs, k = len(alpha), values.shape[1]
+    level = np.broadcast_to(level0, (pairs, k)).copy()
+    trend = np.broadcast_to(trend0, (pairs, k)).copy()
+    sse = np.zeros((pairs, k))
+    count = np.zeros(k)
+
+    for t in range(1, len(values)):
+        y = values[t]
+        active = (t > first) & np.isfinite(y)
+        projected = level + trend
+        error = np.where(active, y - projected, 0.0)
+        new_level = projected + alpha * error
+        trend = np.where(t > first, trend + alpha * beta * error, trend)
+        level = np.where(t > first, new_level, level)
+        sse += error ** 2
+        count += active
+
+    best = np.argmin(sse, axis=0)
+    columns = np.arange(k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(sse[best, columns] / (count - 2))
+    return {'alpha': alpha[best, 0], 'beta': beta[best, 0], 'level': level[best, columns],
+            'trend': trend[best, columns], 'sigma': sigma, 'observations': count}
+
+
+def _fit_columns(values, alphas, betas, start):
+    return start, _fit_block(values, alphas, betas)
+
+
+def fit_holt(values, alphas=ALPHAS, betas=BETAS, max_workers=None, columns_per_task=COLUMNS_PER_TASK):
+    # Holt's linear exponential smoothing fitted to every column of a
+    # (dates, components) matrix, with alpha and beta chosen per column by
+    # least one-step-ahead squared error over the grid. Wide panels are
+    # split into column blocks across a process pool.
+    # Returns {name: (components,) array}: alpha, beta, the final level and
+    # trend, the residual sigma and the number of observations fitted.
+    k = values.shape[1]
+    fit = {}
+
+    def store(result):
+        start, block = result
+        for name, v in block.items():
+            fit.setdefault(name, np.empty(k))[start:start + len(v)] = v
+
+    tasks = [(values[:, s:s + columns_per_task], alphas, betas, s) for s in range(0, k, columns_per_task)]
+    map_chunks(_fit_columns, tasks, store, max_workers)
+    return fit
+
+
+def forecast(fit, horizon, coverage=COVERAGE):
+    # Point forecasts level + h*trend for h = 1..horizon, with normal bands
+    # from the Holt forecast variance sigma^2 (1 + sum_j<h (alpha (1 + j beta))^2).
+    # Returns {'mean': (horizon, k), 'bands': {coverage: (lower, upper)}}.
+    h = np.arange(1, horizon + 1)[:, None]
+    mean = fit['level'] + h * fit['trend']
+    steps = np.arange(horizon)[:, None]
+    c = np.where(steps > 0, fit['alpha'] * (1 + steps * fit['beta']), 0.0)
+    spread = fit['sigma'] * np.sqrt(1 + np.cumsum(c ** 2, axis=0))
+    return {'mean': mean, 'bands': {p: (mean - z * spread, mean + z * spread) for p, z in coverage.items()}}
+
+
+def future_dates(dates, horizon, months=3):
+    # The `horizon` period starts after the last date, a quarter apart by default
+    last = dates[-1].astype('datetime64[M]')
+    return (last + months * np.arange(1, horizon + 1)).astype('datetime64[ns]')
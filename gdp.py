@@ -1,75 +1,56 @@
 import streamlit as st
-from stats_can import StatsCan
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.figure_factory as ff  # Add this line
+import plotly.io as pio
 import pandas as pd
 import datetime
 
+from export import FORMATS, export, file_name
+from gdp_data import current_gdp_panel
+from datasets import GDP
+from forecast import fit_holt
+from gdp_figures import (CORRELATION_MODES, QUESTIONS, forecast_figures, question_figures,
+                         revision_figures)
+from instrumentation import span, track_cache
+from lru import SizedLRU
+from ui import fragment
+from vintages import read_index, revision_history
+
+
+# Serialized figures by (data vintage, question, components, date range),
+# shared by all sessions and bounded by total JSON size
+FIGURE_CACHE_BYTES = 32 * 2**20
+_figure_cache = SizedLRU("figures", FIGURE_CACHE_BYTES, sizeof=lambda figs: sum(map(len, figs)))
+
+# Furthest the forecast view projects, in quarters
+MAX_HORIZON = 20
 
 
 def run_gdp_app():
     # import and clean Data
-    @st.cache_data
+    # One read-only panel per process, shared by every session without
+    # copying: the memory-mapped deploy snapshot if one is built, else the
+    # on-disk cache. The ttl bounds how long a process goes without checking
+    # for a newer release (or a rebuilt snapshot).
+    @track_cache("clean_data", st.cache_resource(ttl=3600))
     def clean_data():
-        sc = StatsCan()
-        dp = sc.table_to_df("36-10-0104-01")
-
-        # Rename columns, and filter rows based on 'Seasonal adjustment', 'Prices' and 'UOM'
-        df = (dp.rename(columns={'REF_DATE': 'date', 'Estimates': 'component', 'VALUE': 'value'})
-                .loc[dp['Seasonal adjustment'] == 'Seasonally adjusted at annual rates']
-                .loc[dp['Prices'] == 'Chained (2012) dollars']
-                .loc[dp['UOM'] == 'Dollars']
-                .reset_index(drop=True))
-
-        # Keep only the 'date', 'component' and 'value' columns
-        df = df[['date','component','value']].copy()
-
-        # Reset index
-        df = df.reset_index(drop=True)
-
-        # Keep only rows where 'component' is in the provided list
-        df = df.loc[df['component'].isin(['Final consumption expenditure',
-                                            'Gross fixed capital formation',
-                                            'Investment in inventories',
-                                            'Exports of goods and services',
-                                            'Less: imports of goods and services',
-                                            'Statistical discrepancy',
-                                            'Gross domestic product at market prices',
-                                            'Final domestic demand'])].copy()
-
-        # Reset index
-        df = df.reset_index(drop=True)
-        return df
+        return current_gdp_panel().freeze()
     
+    mode = st.sidebar.radio("Mode", ["Explore history", "Forecast", "Revisions"], key='gdp_mode')
     start_date = pd.Timestamp(st.sidebar.date_input("Start date", datetime.date(2020, 1, 1)))
     end_date = pd.Timestamp(st.sidebar.date_input("End date", datetime.date.today()))
 
     if start_date > end_date:
         st.sidebar.error("The end date must fall after the start date.")
 
-    def filter_by_date(df, start_date, end_date):
-        # ensure dates are in the right format
-        df['date'] = pd.to_datetime(df['date'])
-
-        # filter by date range
-        mask = (df['date'] >= start_date) & (df['date'] <= end_date)
-        df_filtered = df.loc[mask]
-
-        df_filtered['date'] = pd.to_datetime(df_filtered['date']).dt.date
-
-        return df_filtered
+    def filter_by_date(panel, start_date, end_date):
+        # dates are sorted once in clean_data, so this is two binary searches
+        return panel.window(start_date, end_date)
 
-    # you need to call the function and pass the dataframes returned by clean_data() function 
-    df = clean_data()
-    df_filtered = filter_by_date(df, start_date, end_date)
+    # you need to call the function and pass the panel returned by clean_data() function 
+    with span("clean_data"):
+        panel = clean_data()
+    with span("filter_by_date"):
+        window = filter_by_date(panel, start_date, end_date)
 
-    ###
-    df_filtered=df_filtered.reset_index(drop=True)
-
-    @st.cache_data
-    def convert_df_to_csv(df_filtered):
-        return df_filtered.to_csv().encode("utf-8")
 
 
     ############
@@ -78,143 +59,133 @@ def run_gdp_app():
 
 
 
+    preview_panel(window)
+
+    if mode == "Forecast":
+        st.subheader("Forecasts")
+        forecast_panel(panel, window)
+        return
+    if mode == "Revisions":
+        st.subheader("Revisions")
+        revisions_panel(panel)
+        return
+            
+    st.subheader("National Accounting Analysis")
+    question_panel(window)
+
+
+# The preview/download controls and the question charts each rerun on their
+# own: picking a format or a question does not redraw the other panel
+@fragment("GDP/preview")
+def preview_panel(window):
     #########
     ## data preview part
     data_exp = st.expander("Preview of National Accounting Data.")
-    data_exp.dataframe(df_filtered)
-
-    csv_file = convert_df_to_csv(df_filtered)
+    with span("st.dataframe"):
+        data_exp.dataframe(window.to_wide_frame())
+
+    export_components = data_exp.multiselect("Components to download", window.components,
+                                             default=window.components)
+    export_format = data_exp.radio("Format", list(FORMATS), horizontal=True,
+                                   format_func=str.upper)
+    # keyed on (table and vintage, components, dates, format) in a size-bounded
+    # cache shared by all sessions
+    with span("export"):
+        export_file = export(f"gdp@{window.vintage}", window, export_components, export_format)
     data_exp.download_button(
-        label="Download selected as CSV",
-        data=csv_file,
-        file_name="can_gdp.csv",
-        mime="text/csv",
+        label=f"Download selected as {export_format.upper()}",
+        data=export_file,
+        file_name=file_name("can_gdp", export_format),
+        mime=FORMATS[export_format][0],
     )
-            
-            
-    st.subheader("National Accounting Analysis")
 
+
+@fragment("GDP/question")
+def question_panel(window):
     # Calculate monthly change in cpi by region and product
     default_components = ['Gross domestic product at market prices'] 
-    components = st.multiselect('Choose components', options=list(df['component'].unique()),default=default_components)
-
-    questions = ['1- What are the trends in different components of the national account over time?',
-                '2- Which component has the highest average yearly growth rate?',
-                '3- Which component has the highest value for the last quarter?',
-                '4- What are the trends in growth rate of the different components over time?',
-                '5- What is the correlation between different components of national accounts?'
-                ]
+    components = st.multiselect('Choose components', options=window.components,default=default_components)
 
+    question = st.selectbox("Select a question to answer", QUESTIONS)
 
-    
-    question = st.selectbox("Select a question to answer", questions)
+    correlation = None
+    if question.startswith('5-'):
+        correlation = st.radio("Correlation over", list(CORRELATION_MODES), horizontal=True)
 
     if not components:
          st.error("Please select at least one component.")
     else:
         None
     # Now based on the selected question, display the corresponding plot
-    if question == '1- What are the trends in different components of the national account over time?':
-        fig = go.Figure()
-        for component in components:
-            component_df = df_filtered[df_filtered['component'] == component]
-            fig.add_trace(go.Scatter(x=component_df['date'], y=component_df['value'], name=component))
-        fig.update_layout(autosize=True, title='Component Trends Over Time',
-                        legend=dict(orientation="h",
-                                    yanchor="bottom",
-                                    y=1.02,
-                                    xanchor="right",
-                                    x=1))
-
-        st.plotly_chart(fig)
-
-        fig = go.Figure()
-        for component in components:
-            component_df = df_filtered[df_filtered['component'] == component]
-            fig.add_trace(go.Bar(x=component_df['date'], y=component_df['value'], name=component))
-        fig.update_layout(autosize=True, barmode='stack',
-                        legend=dict(orientation="h",
-                                    yanchor="bottom",
-                                    y=1.02,
-                                    xanchor="right",
-                                    x=1))
-
-        st.plotly_chart(fig)
-
-    elif question == '2- Which component has the highest average yearly growth rate?':
-        df1 = df_filtered.copy()
-
-        # Filter data for selected components
-        filtered_df1 = df1[df1['component'].isin(components)]
-        # Calculate yearly change in value for each component
-        filtered_df1['yearly_change'] = filtered_df1.groupby('component')['value'].pct_change(4)
-        # Calculate average yearly change for each component
-        avg_yearly_change = filtered_df1.groupby('component')['yearly_change'].mean().reset_index()
-        # Create bar chart
-        fig = px.bar(avg_yearly_change, x='component', y='yearly_change')
-        st.plotly_chart(fig)
-
-    elif question == '3- Which component has the highest value for the last quarter?':
-        df = df_filtered.copy()
-        max_date = df['date'].max()
-
-        # Filter data for selected components and the last quarter
-        filtered_df = df[(df['component'].isin(components)) & (df['date'] == max_date)]
-        
-        # Create bar chart
-        fig = px.bar(filtered_df, x='component', y='value')
-        st.plotly_chart(fig)
-
-    elif question == '4- What are the trends in growth rate of the different components over time?':
-        # Compute yearly change (growth rate) for each component
-        df_filtered['yearly_change'] = df_filtered.groupby('component')['value'].pct_change(4) * 100  # multiply by 100 to get percentage
-
-        # Filter dataframe based on selected components
-        filtered_df = df_filtered[df_filtered['component'].isin(components)]
-
-        # Create line plot for each component
-        fig = go.Figure()
-        for component in components:
-            component_df = filtered_df[filtered_df['component'] == component]
-            fig.add_trace(go.Scatter(x=component_df['date'], y=component_df['yearly_change'], name=component))
-
-        # Update layout to place the legend below the chart
-        fig.update_layout(autosize=True, title='Yearly Change in Component Values Over Time',
-                        legend=dict(orientation="h",
-                                    yanchor="bottom",
-                                    y=1.02,
-                                    xanchor="right",
-                                    x=1))
-
-        st.plotly_chart(fig)
-
-
-    elif question == '5- What is the correlation between different components of national accounts?':
-        # Pivot the data to get components as columns
-        pivot_df = df_filtered.pivot(index='date', columns='component', values='value')
-        
-        # Compute correlation matrix
-        correlation_matrix = pivot_df.corr()
-
-        # Create a heatmap
-        fig = ff.create_annotated_heatmap(
-            z=correlation_matrix.values,
-            x=list(correlation_matrix.columns),
-            y=list(correlation_matrix.index),
-            annotation_text=correlation_matrix.round(2).values,
-            colorscale='Blues',
-            showscale=True)
-
-        # Update layout
-        fig.update_layout(
-            #title='Correlation Between Different Components of National Accounts',
-            xaxis_nticks=len(correlation_matrix.columns),
-            yaxis_nticks=len(correlation_matrix.columns),
-            autosize=False,
-            width=800, 
-            height=600,
-            margin=dict(t=100, b=100, l=100, r=100),
-        )
-        st.plotly_chart(fig)
-
-    
+    with span("figures"):
+        figures = cached_question_figures(window, question, components, correlation)
+    with span("st.plotly_chart"):
+        for fig in figures:
+            st.plotly_chart(fig)
+
+
+@fragment("GDP/forecast")
+def forecast_panel(panel, window):
+    components = st.multiselect('Choose components', options=panel.components,
+                                default=['Gross domestic product at market prices'], key='forecast_components')
+    horizon = st.slider("Quarters ahead", 1, MAX_HORIZON, 8, key='horizon')
+    with span("forecast_fit"):
+        fit = load_forecast_fit(panel.vintage, panel)
+    with span("figures"):
+        figures = forecast_figures(window, components, fit, horizon, panel.dates[-1])
+    with span("st.plotly_chart"):
+        for fig in figures:
+            st.plotly_chart(fig)
+
+    st.caption("Holt's linear trend, fitted to the full history of each component")
+    st.dataframe(pd.DataFrame({'alpha': fit['alpha'], 'beta': fit['beta'], 'sigma': fit['sigma'],
+                               'quarters fitted': fit['observations'].astype(int)},
+                              index=pd.Index(panel.components, name='component')))
+
+
+# Every component is fitted once per data vintage and shared by all sessions;
+# page views only project the stored states forward
+@track_cache("forecast_fit", st.cache_resource(max_entries=4))
+def load_forecast_fit(vintage, _panel):
+    return fit_holt(_panel.values)
+
+
+@fragment("GDP/revisions")
+def revisions_panel(panel):
+    with span("revision_history"):
+        history = load_revision_history(panel.vintage)
+    if history is None or len(history['releases']) < 2:
+        st.info("Revisions show up once more than one StatsCan release has been recorded.")
+        return
+    component = st.selectbox("Component", history['components'],
+                             index=history['components'].index('Gross domestic product at market prices'),
+                             key='revision_component')
+    with span("figures"):
+        figures = revision_figures(history, component)
+    with span("st.plotly_chart"):
+        for fig in figures:
+            st.plotly_chart(fig)
+
+    st.caption("Cells stored per release; later releases keep only the cells that changed")
+    st.dataframe(pd.DataFrame(read_index(GDP.name)['vintages']).set_index('release'))
+
+
+# Rebuilt when the current vintage changes, i.e. after a new release is recorded
+@track_cache("revision_history", st.cache_resource(max_entries=2))
+def load_revision_history(vintage):
+    return revision_history(GDP.name)
+
+
+def cached_question_figures(window, question, components, correlation=None):
+    # question_figures memoized as figure JSON. Components are put in panel
+    # order so any selection order of the same set shares an entry; the
+    # whole-range correlation matrix always covers every component.
+    components = [c for c in window.components if c in set(components)]
+    if question.startswith('5-') and CORRELATION_MODES.get(correlation) is None:
+        components = []
+    key = (window.vintage, question, tuple(components), *window.bounds(), correlation)
+    cached = _figure_cache.get(key)
+    if cached is None:
+        cached = [fig.to_json() for fig in question_figures(window, question, components, correlation)]
+        _figure_cache.put(key, cached)
+    return [pio.from_json(s) for s in cached]
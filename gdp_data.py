@@ -0,0 +1,52 @@
+import logging
+import pathlib
+
+from datasets import GDP, load_dataset, parse_table
+from instrumentation import span
+from metrics import compute_metrics
+from panel import Panel
+from snapshot import load_snapshot
+from table_cache import read_manifest
+from vintages import record_vintage
+
+
+logger = logging.getLogger(__name__)
+
+
+TABLE_ID = GDP.table_id
+COMPONENTS = GDP.members['Estimates']
+
+
+def parse_gdp_table(zip_path):
+    return parse_table(GDP, zip_path)
+
+
+def load_gdp(downloader=None, cache_dir=None):
+    return load_dataset(GDP, downloader=downloader, cache_dir=cache_dir)
+
+
+def load_gdp_panel(downloader=None, cache_dir=None):
+    # Wide panel with the derived metrics computed once over the full history
+    with span("statscan_fetch"):
+        df = load_gdp(downloader, cache_dir)
+    with span("build_panel"):
+        panel = Panel.from_frame(df)
+    with span("metrics"):
+        panel.metrics = compute_metrics(panel.values, GDP.periods_per_year)
+    panel.vintage = read_manifest(GDP.name, cache_dir)['release']
+    # Keep this release in the vintage store (a no-op when it is already
+    # there); losing one only costs the revisions view a data point
+    with span("record_vintage"):
+        try:
+            record_vintage(GDP.name, panel, cache_dir and pathlib.Path(cache_dir) / 'vintages')
+        except OSError:
+            logger.warning("Could not record GDP release %s", panel.vintage, exc_info=True)
+    return panel
+
+
+def current_gdp_panel():
+    # The deploy-time snapshot when one has been built, memory-mapped with
+    # no network or parsing; otherwise the cached or freshly fetched table
+    with span("snapshot"):
+        panel = load_snapshot(GDP.name)
+    return panel if panel is not None else load_gdp_panel()
@@ -0,0 +1,244 @@
+import plotly.express as px
+import plotly.graph_objects as go
+import pandas as pd
+import numpy as np
+
+from correlation import rolling_correlation
+from forecast import forecast, future_dates
+
+
+QUESTIONS = ['1- What are the trends in different components of the national account over time?',
+             '2- Which component has the highest average yearly growth rate?',
+             '3- Which component has the highest value for the last quarter?',
+             '4- What are the trends in growth rate of the different components over time?',
+             '5- What is the correlation between different components of national accounts?'
+             ]
+
+# How question 5 measures co-movement: the panel metric holding the
+# precomputed stack, 'expanding' for one computed over the date range, or
+# None for a single matrix over the whole range
+CORRELATION_MODES = {'Whole date range': None,
+                     'Rolling 2 years': 'corr_8',
+                     'Rolling 5 years': 'corr_20',
+                     'Expanding from start date': 'expanding'}
+
+
+def question_figures(window, question, components, correlation=None):
+    # Plotly figures answering `question` for the selected components over a
+    # date window of the panel
+    figures = []
+    if question == '1- What are the trends in different components of the national account over time?':
+        fig = go.Figure()
+        for component in components:
+            fig.add_trace(go.Scatter(x=window.dates, y=window.series(component), name=component))
+        fig.update_layout(autosize=True, title='Component Trends Over Time',
+                        legend=dict(orientation="h",
+                                    yanchor="bottom",
+                                    y=1.02,
+                                    xanchor="right",
+                                    x=1))
+
+        figures.append(fig)
+
+        fig = go.Figure()
+        for component in components:
+            fig.add_trace(go.Bar(x=window.dates, y=window.series(component), name=component))
+        fig.update_layout(autosize=True, barmode='stack',
+                        legend=dict(orientation="h",
+                                    yanchor="bottom",
+                                    y=1.02,
+                                    xanchor="right",
+                                    x=1))
+
+        figures.append(fig)
+
+    elif question == '2- Which component has the highest average yearly growth rate?':
+        # Yearly change is precomputed over the full history, so the window
+        # edges already have values; average it for each selected component
+        yearly_change = window.metrics['yoy'][:, [window.column(c) for c in components]]
+        avg_yearly_change = pd.DataFrame({'component': components,
+                                          'yearly_change': np.nanmean(yearly_change, axis=0)})
+        # Create bar chart
+        fig = px.bar(avg_yearly_change, x='component', y='yearly_change')
+        figures.append(fig)
+
+    elif question == '3- Which component has the highest value for the last quarter?':
+        # Selected components at the last quarter of the window
+        filtered_df = pd.DataFrame({'component': components,
+                                    'value': [window.series(c)[-1] if len(window.dates) else np.nan
+                                              for c in components]})
+
+        # Create bar chart
+        fig = px.bar(filtered_df, x='component', y='value')
+        figures.append(fig)
+
+    elif question == '4- What are the trends in growth rate of the different components over time?':
+        # Create line plot of the yearly change (growth rate) for each component
+        fig = go.Figure()
+        for component in components:
+            yearly_change = window.series(component, 'yoy') * 100  # multiply by 100 to get percentage
+            fig.add_trace(go.Scatter(x=window.dates, y=yearly_change, name=component))
+
+        # Update layout to place the legend below the chart
+        fig.update_layout(autosize=True, title='Yearly Change in Component Values Over Time',
+                        legend=dict(orientation="h",
+                                    yanchor="bottom",
+                                    y=1.02,
+                                    xanchor="right",
+                                    x=1))
+
+        figures.append(fig)
+
+
+    elif question == '5- What is the correlation between different components of national accounts?' \
+            and CORRELATION_MODES.get(correlation) is not None:
+        figures.extend(correlation_figures(window, components, CORRELATION_MODES[correlation]))
+
+    elif question == '5- What is the correlation between different components of national accounts?':
+        # The panel already has components as columns
+        pivot_df = pd.DataFrame(window.values, columns=window.components)
+
+        # Compute correlation matrix
+        correlation_matrix = pivot_df.corr()
+
+        # Create a heatmap, labelling cells with a text template rather than
+        # one annotation object per cell
+        fig = go.Figure(go.Heatmap(
+            z=correlation_matrix.values,
+            x=list(correlation_matrix.columns),
+            y=list(correlation_matrix.index),
+            texttemplate='%{z:.2f}',
+            colorscale='Blues',
+            showscale=True))
+
+        # Update layout
+        fig.update_layout(
+            #title='Correlation Between Different Components of National Accounts',
+            xaxis_nticks=len(correlation_matrix.columns),
+            yaxis_nticks=len(correlation_matrix.columns),
+            autosize=False,
+            width=800, 
+            height=600,
+            margin=dict(t=100, b=100, l=100, r=100),
+        )
+        figures.append(fig)
+
+    return figures
+
+
+def correlation_figures(window, components, stack_name):
+    # Correlation matrix at every date of the window, as an animated heatmap
+    # with a date slider, and the correlation of each selected pair over time
+    if stack_name == 'expanding':
+        stack = rolling_correlation(window.values)
+    else:
+        stack = window.metrics[stack_name]
+    rows = [i for i in range(len(stack)) if np.isfinite(stack[i]).any()]
+    labels = [str(d) for d in window.dates.astype('datetime64[D]')]
+    heatmap = dict(x=window.components, y=window.components, texttemplate='%{z:.2f}',
+                   colorscale='Blues', zmin=-1, zmax=1)
+
+    frames = [go.Frame(data=[go.Heatmap(z=stack[i], **heatmap)], name=labels[i]) for i in rows]
+    fig = go.Figure(data=frames[-1].data if frames else [go.Heatmap(z=[], **heatmap)], frames=frames)
+    fig.update_layout(
+        autosize=False,
+        width=800,
+        height=650,
+        margin=dict(t=100, b=100, l=100, r=100),
+    )
+    if frames:
+        fig.update_layout(
+            sliders=[dict(active=len(frames) - 1,
+                          currentvalue=dict(prefix='Window ending '),
+                          steps=[dict(label=f.name, method='animate',
+                                      args=[[f.name], dict(mode='immediate', frame=dict(duration=0, redraw=True))])
+                                 for f in frames])],
+            updatemenus=[dict(type='buttons', showactive=False, y=1.15, x=0, xanchor='left',
+                              buttons=[dict(label='Play', method='animate',
+                                            args=[None, dict(frame=dict(duration=150, redraw=True), fromcurrent=True)]),
+                                       dict(label='Pause', method='animate',
+                                            args=[[None], dict(mode='immediate', frame=dict(duration=0))])])],
+        )
+    else:
+        # No date in the window has enough history for a correlation (an empty
+        # or reversed range, or one shorter than the expanding minimum)
+        fig.add_annotation(text='Not enough data in this date range for a correlation',
+                           xref='paper', yref='paper', x=0.5, y=0.5, showarrow=False)
+    figures = [fig]
+
+    if len(components) > 1:
+        fig = go.Figure()
+        columns = [window.column(c) for c in components]
+        for a, i in enumerate(columns):
+            for j in columns[a + 1:]:
+                fig.add_trace(go.Scatter(x=window.dates, y=stack[:, i, j],
+                                         name=f'{window.components[i]} / {window.components[j]}'))
+        fig.update_layout(autosize=True, title='Correlation Between Selected Components Over Time',
+                          yaxis=dict(range=[-1, 1]),
+                          legend=dict(orientation="h",
+                                      yanchor="bottom",
+                                      y=1.02,
+                                      xanchor="right",
+                                      x=1))
+        figures.append(fig)
+
+    return figures
+
+
+def forecast_figures(window, components, fit, horizon, last_date):
+    # One fan chart per selected component: the window's history, then the
+    # point forecast from `last_date` with its bands, widest first
+    outlook = forecast(fit, horizon)
+    dates = future_dates(np.array([last_date]), horizon)
+    figures = []
+    for component in components:
+        i = window.column(component)
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=window.dates, y=window.series(component), name='History',
+                                 line=dict(color='black')))
+        for coverage, (lower, upper) in sorted(outlook['bands'].items(), reverse=True):
+            fig.add_trace(go.Scatter(x=dates, y=upper[:, i], line=dict(width=0), showlegend=False,
+                                     hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=dates, y=lower[:, i], line=dict(width=0), fill='tonexty',
+                                     fillcolor=f'rgba(31, 119, 180, {0.15 + 0.2 * (1 - coverage)})',
+                                     name=f'{coverage:.0%} band'))
+        fig.add_trace(go.Scatter(x=dates, y=outlook['mean'][:, i], name='Forecast',
+                                 line=dict(color='rgb(31, 119, 180)')))
+        fig.update_layout(autosize=True,
+                          title=f"{component} (alpha {fit['alpha'][i]:.2f}, beta {fit['beta'][i]:.2f})",
+                          legend=dict(orientation="h",
+                                      yanchor="bottom",
+                                      y=1.02,
+                                      xanchor="right",
+                                      x=1))
+        figures.append(fig)
+    return figures
+
+
+def revision_figures(history, component):
+    # How one component's quarters were revised from release to release: a
+    # heatmap of each release's change against the one before (in percent),
+    # and the total revision from first published to latest value per quarter
+    values = history['values'][:, :, history['components'].index(component)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = (values[1:] / values[:-1] - 1) * 100
+        published = np.isfinite(values)
+        first = values[np.argmax(published, axis=0), np.arange(values.shape[1])]
+        total = (values[-1] / first - 1) * 100
+    revised = np.isfinite(step).any(axis=0) & (np.nan_to_num(step) != 0).any(axis=0)
+    labels = [str(d) for d in history['dates'].astype('datetime64[D]')]
+
+    fig = go.Figure(go.Heatmap(
+        z=np.where(step[:, revised] != 0, step[:, revised], np.nan),
+        x=[label for label, r in zip(labels, revised) if r],
+        y=history['releases'][1:],
+        colorscale='RdBu', zmid=0, colorbar=dict(title='%')))
+    fig.update_layout(autosize=True, title=f'{component}: revision by release (% of previous estimate)',
+                      xaxis_title='Quarter', yaxis_title='Release')
+    figures = [fig]
+
+    fig = go.Figure(go.Bar(x=history['dates'], y=np.where(published.sum(axis=0) > 1, total, np.nan)))
+    fig.update_layout(autosize=True, title=f'{component}: latest estimate against first published (%)',
+                      xaxis_title='Quarter')
+    figures.append(fig)
+    return figures
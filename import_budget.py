@@ -0,0 +1,68 @@
+# Measure the cold import time of the app and of each page module, each in a
+# fresh interpreter, and fail when one goes over its budget or when a
+# headless module pulls in Streamlit.
+#
+#   python import_budget.py [--repeat N]
+
+import argparse
+import re
+import subprocess
+import sys
+
+
+# Milliseconds of cumulative import time allowed per module
+BUDGETS_MS = {
+    'app': 900,
+    'gdp': 1800,
+    'sim': 1600,
+    'sim2': 1600,
+    'cli': 150,
+}
+
+# Modules batch jobs import; none of them may import streamlit
+HEADLESS = ('cli', 'datasets', 'gdp_data', 'gdp_figures', 'panel', 'metrics', 'correlation',
+            'model', 'sweep', 'dynamics', 'export', 'table_cache', 'instrumentation', 'snapshot',
+            'forecast', 'parallel', 'vintages')
+
+
+def import_times(module):
+    # {imported module: cumulative ms} for a cold import, from python -X importtime
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$', line)
+        if match:
+            times[match.group(2)] = int(match.group(1)) / 1000
+    return times
+
+
+def import_time_ms(module):
+    # Cumulative time of the top-level import
+    times = import_times(module)
+    if module not in times:
+        raise RuntimeError(f"no import time reported for {module}")
+    return times[module]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cold import times against their budgets.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per module; the fastest is kept")
+    args = parser.parse_args()
+
+    over = []
+    for module, budget in BUDGETS_MS.items():
+        ms = min(import_time_ms(module) for _ in range(args.repeat))
+        status = 'ok' if ms <= budget else 'OVER'
+        print(f"{module:<8} {ms:8.0f} ms  budget {budget:5d} ms  {status}")
+        if ms > budget:
+            over.append(module)
+    for module in HEADLESS:
+        if 'streamlit' in import_times(module):
+            print(f"{module:<8} imports streamlit")
+            over.append(module)
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import zipfile
+
+import pandas as pd
+
+
+def read_filtered_zip(zip_path, csv_name, rename, filters, members=None,
+                      value_dtype="float64", chunksize=50_000):
+    # Stream a zipped StatsCan CSV and keep only the rows matching `filters`
+    # ({column: value}) and `members` ({column: allowed values}). Only the
+    # renamed columns and the filter columns are parsed, and rows are dropped
+    # chunk by chunk, so memory follows the filtered output rather than the
+    # raw table.
+    members = members or {}
+    usecols = list(dict.fromkeys([*rename, *filters, *members]))
+    dtypes = {col: "category" for col in usecols if col not in ("REF_DATE", "VALUE")}
+    dtypes["REF_DATE"] = str
+    dtypes["VALUE"] = value_dtype
+
+    parts = []
+    with zipfile.ZipFile(zip_path) as archive, archive.open(csv_name) as f:
+        for chunk in pd.read_csv(f, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+            mask = pd.Series(True, index=chunk.index)
+            for col, value in filters.items():
+                mask &= chunk[col] == value
+            for col, allowed in members.items():
+                mask &= chunk[col].isin(allowed)
+            parts.append(chunk.loc[mask, list(rename)].rename(columns=rename))
+
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=list(rename.values()))
+
+    # Member columns become categoricals in the order they were declared
+    for col, allowed in members.items():
+        if col in rename:
+            df[rename[col]] = pd.Categorical(df[rename[col]].astype(str), categories=list(allowed))
+    if "REF_DATE" in rename:
+        df[rename["REF_DATE"]] = pd.to_datetime(df[rename["REF_DATE"]])
+    if "VALUE" in rename:
+        df[rename["VALUE"]] = df[rename["VALUE"]].astype(value_dtype)
+    return df
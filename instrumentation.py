@@ -0,0 +1,128 @@
+import collections
+import contextlib
+import functools
+import json
+import logging
+import os
+import resource
+import threading
+import time
+
+
+logger = logging.getLogger("macro.diagnostics")
+
+# Streamlit runs each session's script on its own thread, so the rerun being
+# recorded is per thread; cache counters are shared by the whole process
+_local = threading.local()
+_lock = threading.Lock()
+_cache_calls = collections.Counter()
+_cache_misses = collections.Counter()
+
+
+def rss_bytes():
+    # Current resident set size; falls back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextlib.contextmanager
+def rerun(page):
+    # Record one script run: the spans opened inside it, the cache activity
+    # and the change in RSS. The record is logged as one JSON line on exit.
+    record = {"page": page, "spans": [], "caches": {}}
+    calls, misses = cache_counts()
+    rss = rss_bytes()
+    start = time.perf_counter()
+    _local.record, _local.stack = record, []
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        record["rss_delta_bytes"] = rss_bytes() - rss
+        now_calls, now_misses = cache_counts()
+        for name in now_calls:
+            call_delta = now_calls[name] - calls[name]
+            if call_delta:
+                miss_delta = now_misses[name] - misses[name]
+                record["caches"][name] = {"hits": call_delta - miss_delta, "misses": miss_delta}
+        _local.record = None
+        logger.info(json.dumps(record))
+
+
+def in_rerun():
+    return getattr(_local, "record", None) is not None
+
+
+@contextlib.contextmanager
+def span(name):
+    # Time a stage of the current rerun; nested spans are named "outer/inner".
+    # Outside a rerun (scripts, benchmarks) this does nothing.
+    if not in_rerun():
+        yield
+        return
+    record = _local.record
+    _local.stack.append(name)
+    path = "/".join(_local.stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["spans"].append({"name": path, "seconds": round(time.perf_counter() - start, 6)})
+        _local.stack.pop()
+
+
+def track_cache(name, cache):
+    # Wrap `cache` (st.cache_data, functools.lru_cache, ...) so every call and
+    # every miss is counted; hits are the calls the cache answered itself
+    def decorator(fn):
+        @functools.wraps(fn)
+        def on_miss(*args, **kwargs):
+            with _lock:
+                _cache_misses[name] += 1
+            return fn(*args, **kwargs)
+
+        cached = cache(on_miss)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            with _lock:
+                _cache_calls[name] += 1
+            return cached(*args, **kwargs)
+
+        call.cached = cached
+        return call
+    return decorator
+
+
+def record_cache(name, hit):
+    # Count one lookup in a cache that does its own bookkeeping
+    with _lock:
+        _cache_calls[name] += 1
+        if not hit:
+            _cache_misses[name] += 1
+
+
+def cache_counts():
+    with _lock:
+        return collections.Counter(_cache_calls), collections.Counter(_cache_misses)
+
+
+def cache_stats():
+    # Process-wide totals: {name: {"hits", "misses", "hit_rate"}}
+    calls, misses = cache_counts()
+    return {name: {"hits": calls[name] - misses[name], "misses": misses[name],
+                   "hit_rate": (calls[name] - misses[name]) / calls[name]}
+            for name in sorted(calls)}
+
+
+def enable_json_logs():
+    # Send the per-rerun records to stderr, one JSON object per line
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
@@ -0,0 +1,39 @@
+import collections
+import threading
+
+from instrumentation import record_cache
+
+
+class SizedLRU:
+    # Thread-safe LRU bounded by the total size of its values (`sizeof`,
+    # len by default) rather than by entry count. Lookups are counted under
+    # `name` for the diagnostics panel.
+
+    def __init__(self, name, max_size, sizeof=len):
+        self.name = name
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self._size = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+        record_cache(self.name, hit=value is not None)
+        return value
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = value
+            self._size += size
+            while self._size > self.max_size:
+                _, old = self._items.popitem(last=False)
+                self._size -= self.sizeof(old)
@@ -0,0 +1,54 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from correlation import MIN_PERIODS, rolling_correlation
+
+
+# Default frequency, quarterly; tables pass their own (TableSpec.periods_per_year)
+PERIODS_PER_YEAR = 4
+
+# Trailing windows (in years) of the precomputed correlation stacks
+CORRELATION_YEARS = (2, 5)
+
+
+def lagged_change(values, lag):
+    # Fractional change against `lag` rows earlier; the first `lag` rows are NaN
+    out = np.full(values.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[lag:] = values[lag:] / values[:-lag] - 1
+    return out
+
+
+def rolling_mean(values, window):
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).mean(axis=-1)
+    return out
+
+
+def correlation_windows(periods_per_year=PERIODS_PER_YEAR):
+    # CORRELATION_YEARS in rows: (8, 20) for quarterly data, (24, 60) monthly.
+    # None is shorter than MIN_PERIODS, which would leave its stack all NaN,
+    # so annual data gets (3, 5).
+    return tuple(dict.fromkeys(max(years * periods_per_year, MIN_PERIODS) for years in CORRELATION_YEARS))
+
+
+def compute_metrics(values, periods_per_year=PERIODS_PER_YEAR):
+    # Derived series for every component over the full history, aligned row
+    # for row with `values` so a date window slices them all the same way.
+    # 'qoq' is the change on the previous row, whatever the table's period;
+    # 'yoy' and the rolling mean span one year of rows. 'corr_<w>' are
+    # (dates, components, components) correlation stacks over the trailing
+    # w rows, one per entry of correlation_windows().
+    qoq = lagged_change(values, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annualized = (1 + qoq) ** periods_per_year - 1
+        log_level = np.log(np.where(values > 0, values, np.nan))
+    metrics = {'yoy': lagged_change(values, periods_per_year),
+               'qoq': qoq,
+               'annualized': annualized,
+               'rolling_mean': rolling_mean(values, periods_per_year),
+               'log_level': log_level}
+    for window in correlation_windows(periods_per_year):
+        metrics[f'corr_{window}'] = rolling_correlation(values, window)
+    return metrics
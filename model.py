@@ -0,0 +1,68 @@
+import numpy as np
+
+
+# Aggregate demand curves drawn on the simulation pages, innermost first
+CURVES = ('C', 'C + I', 'C + I + G', 'C + I + G + NX')
+
+
+def multiplier(slope):
+    # 1 / (1 - slope of AD in Y); infinite when AD runs parallel to the 45-degree line
+    with np.errstate(divide='ignore'):
+        return 1 / (1 - np.asarray(slope, dtype='float64'))
+
+
+def _solve(autonomous, k):
+    with np.errstate(invalid='ignore'):
+        return autonomous * k
+
+
+def lump_sum_equilibrium(c0, c1, T, I, G, NX):
+    # Model of sim.py: AD = (c0 - T) + c1*Y + I + G + NX. Every argument may
+    # be a scalar or an array; they broadcast against each other.
+    k = multiplier(c1)
+    base = np.asarray(c0, dtype='float64') - T
+    return {'C': _solve(base, k),
+            'C + I': _solve(base + I, k),
+            'C + I + G': _solve(base + I + G, k),
+            'C + I + G + NX': _solve(base + I + G + NX, k),
+            'multiplier': k}
+
+
+def proportional_equilibrium(c0, c1, tax_rate, I, G, X, M1):
+    # Model of sim2.py: T = tax_rate*Y, C = c0 + c1*(Y - T), imports
+    # M = M1*(Y - T) and NX = X - M. Imports only enter the last curve, so it
+    # has its own multiplier. S = Y - C - G meets I where C + I + G meets Y.
+    disposable = 1 - np.asarray(tax_rate, dtype='float64')
+    k_closed = multiplier(c1 * disposable)
+    k_open = multiplier((c1 - np.asarray(M1)) * disposable)
+    c0 = np.asarray(c0, dtype='float64')
+    return {'C': _solve(c0, k_closed),
+            'C + I': _solve(c0 + I, k_closed),
+            'C + I + G': _solve(c0 + I + G, k_closed),
+            'C + I + G + NX': _solve(c0 + I + G + X, k_open),
+            'S = I': _solve(c0 + I + G, k_closed),
+            'multiplier': k_open}
+
+
+def output_range(equilibria, low=0, high=700, points=100):
+    # Income grid for plotting that always contains the finite equilibria
+    values = np.array([v for v in equilibria if np.isfinite(v)] or [0.0])
+    return np.linspace(min(low, 1.1 * values.min()), max(high, 1.1 * values.max()), points)
+
+
+def lump_sum_partials(c0, c1, T, I, G, NX):
+    # dY/dparam of the full C + I + G + NX equilibrium
+    eq = lump_sum_equilibrium(c0, c1, T, I, G, NX)
+    y, k = eq['C + I + G + NX'], eq['multiplier']
+    with np.errstate(invalid='ignore'):
+        return {'c0': k, 'c1': y * k, 'T': -k, 'I': k, 'G': k, 'NX': k}
+
+
+def proportional_partials(c0, c1, tax_rate, I, G, X, M1):
+    # dY/dparam of the full C + I + G + NX equilibrium
+    eq = proportional_equilibrium(c0, c1, tax_rate, I, G, X, M1)
+    y, k = eq['C + I + G + NX'], eq['multiplier']
+    disposable = 1 - np.asarray(tax_rate, dtype='float64')
+    with np.errstate(invalid='ignore'):
+        return {'c0': k, 'c1': y * disposable * k, 'tax_rate': -y * (c1 - np.asarray(M1)) * k,
+                'I': k, 'G': k, 'X': k, 'M1': -y * disposable * k}
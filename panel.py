@@ -0,0 +1,71 @@
+import types
+
+import numpy as np
+import pandas as pd
+
+
+class Panel:
+    # Wide view of a long (date, component, value) table: `values` has one row
+    # per date and one column per component, with `dates` sorted ascending so
+    # date ranges can be cut out with searchsorted.
+
+    def __init__(self, dates, components, values, metrics=None, vintage=None):
+        self.dates = dates
+        self.components = list(components)
+        self.values = values
+        # derived series (see metrics.compute_metrics), same shape as values
+        self.metrics = metrics or {}
+        # release the data came from, for keying caches of derived output
+        self.vintage = vintage
+        self._columns = {c: i for i, c in enumerate(self.components)}
+
+    @classmethod
+    def from_frame(cls, df, date='date', component='component', value='value'):
+        wide = df.pivot(index=date, columns=component, values=value).sort_index()
+        if isinstance(df[component].dtype, pd.CategoricalDtype):
+            wide = wide.reindex(columns=df[component].cat.categories)
+        dates = wide.index.to_numpy(dtype='datetime64[ns]')
+        values = np.ascontiguousarray(wide.to_numpy(dtype='float64'))
+        return cls(dates, wide.columns, values)
+
+    def freeze(self):
+        # Make every array read-only so one panel can be shared by all
+        # sessions and threads; windows of it are read-only views too
+        for a in (self.dates, self.values, *self.metrics.values()):
+            a.flags.writeable = False
+        self.metrics = types.MappingProxyType(dict(self.metrics))
+        return self
+
+    def window(self, start, end):
+        # Rows with start <= date <= end, as views on the same arrays
+        lo = np.searchsorted(self.dates, pd.Timestamp(start).to_datetime64(), side='left')
+        hi = np.searchsorted(self.dates, pd.Timestamp(end).to_datetime64(), side='right')
+        return Panel(self.dates[lo:hi], self.components, self.values[lo:hi],
+                     {name: m[lo:hi] for name, m in self.metrics.items()}, self.vintage)
+
+    def bounds(self):
+        # First and last date as 'YYYY-MM-DD', or (None, None) when empty;
+        # date inputs that cut the same quarters give the same bounds
+        if not len(self.dates):
+            return None, None
+        return tuple(str(d) for d in self.dates[[0, -1]].astype('datetime64[D]'))
+
+    def column(self, component):
+        return self._columns[component]
+
+    def series(self, component, metric=None):
+        values = self.values if metric is None else self.metrics[metric]
+        return values[:, self._columns[component]]
+
+    def to_wide_frame(self):
+        # Dates down, components across, sharing memory with the panel
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates, name='date'),
+                            columns=self.components, copy=False)
+
+    def to_frame(self):
+        # Back to the long layout, one row per observed (date, component)
+        n, k = self.values.shape
+        df = pd.DataFrame({'date': pd.to_datetime(np.repeat(self.dates, k)).date,
+                           'component': np.tile(np.array(self.components, dtype=object), n),
+                           'value': self.values.ravel()})
+        return df.loc[df['value'].notna()].reset_index(drop=True)
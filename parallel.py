@@ -0,0 +1,23 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_chunks(fn, tasks, store, max_workers=None):
+    # store(fn(*task)) for every task, on a process pool when there is more
+    # than one, with at most two tasks per worker in flight. Workers are
+    # spawned, so `fn` must be importable from a module.
+    if len(tasks) <= 1 or max_workers == 1:
+        for task in tasks:
+            store(fn(*task))
+        return
+    workers = max_workers or os.cpu_count() or 1
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = []
+        for task in tasks:
+            pending.append(pool.submit(fn, *task))
+            if len(pending) >= 2 * workers:
+                store(pending.pop(0).result())
+        for future in pending:
+            store(future.result())
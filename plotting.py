@@ -0,0 +1,24 @@
+import functools
+import io
+
+
+# Rendered images kept per simulation page, keyed by the slider values
+RENDER_CACHE_SIZE = 64
+
+
+@functools.cache
+def apply_style():
+    # Global matplotlib style, set once per process by the first plotting page
+    import seaborn as sns
+
+    sns.set(color_codes=True)
+
+
+def png_bytes(fig):
+    # Render a matplotlib Figure to PNG and release its artists. Figures are
+    # built with matplotlib.figure.Figure, never pyplot, so nothing is left
+    # registered globally once this returns.
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    fig.clear()
+    return buf.getvalue()
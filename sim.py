@@ -1,17 +1,30 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set(color_codes=True)
+from matplotlib.figure import Figure
 import numpy as np
+import functools
+
+from config import LIVE_UPDATES
+from model import CURVES, lump_sum_equilibrium, output_range
+from instrumentation import span, track_cache
+from plotting import RENDER_CACHE_SIZE, apply_style, png_bytes
+from sweep_view import render_sweep
+from ui import controls, fragment
 
 def run_sim_app():
     st.subheader("Interactive Keynesian Equilibrium Plot-1")
 
+    mode = st.sidebar.radio("Mode", ["Single configuration", "Parameter sweep"], key='mode')
+    if mode == "Parameter sweep":
+        render_sweep('lump_sum')
+        return
+
+    live = st.sidebar.checkbox("Update while adjusting", value=LIVE_UPDATES, key='live')
+
     instructions_expander = st.expander("**Instructions**")
     with instructions_expander:
         st.markdown("""
         
-        1. **Autonomous Consumption (C0):** Use the slider on the left sidebar to adjust the level of autonomous consumption (C0).
+        1. **Autonomous Consumption (C0):** Use the slider above the chart to adjust the level of autonomous consumption (C0).
 
         2. **Marginal Propensity to Consume (C1):** Adjust the slider to set the value of C1. 
                     
@@ -23,91 +36,84 @@ def run_sim_app():
 
         6. **Net Exports (NX):** Use the slider to adjust the level of net exports (NX).
 
-        7. **Interpreting the Chart:** The plot shows different levels of aggregate demand (AD) based on the selected values of C0, C1, I, G, and NX.
-
-        8. **Interpreting Equilibrium Points:** The intersection of any line with the 45-degree line represents the Keynesian equilibrium point.
-
-        """)
+        7. **Applying Changes:** Make your changes with the sliders, then press **Apply** to redraw the chart once. Tick "Update while adjusting" in the sidebar to redraw on every slider move instead.
 
-    c0_expander = st.sidebar.expander("Autonomous Consumption")
-    c0 = c0_expander.slider("Autonomous Consumption", min_value=0, max_value=100, value=100, key='c0')
+        8. **Interpreting the Chart:** The plot shows different levels of aggregate demand (AD) based on the selected values of C0, C1, I, G, and NX.
 
-    c1_expander = st.sidebar.expander("Marginal Propensity to Consume")
-    c1 = c1_expander.slider("Marginal Propensity to Consume", min_value=0.0, max_value=1.0, value=0.5, step=0.1, key='c1')
-
-    T_expander = st.sidebar.expander("Taxation")
-    T = T_expander.slider("", min_value=0, max_value=100, value=20, key='t0')
-
-    
-    I_expander = st.sidebar.expander("Investment")
-    I = I_expander.slider("Investment", min_value=10, max_value=100, value=50, key='I')
-    
-    G_expander = st.sidebar.expander("Government spending")
-    G = G_expander.slider("Government spending", min_value=10, max_value=100, value=50, key='G')
-    
-    NX_expander = st.sidebar.expander("Net exports")
-    NX = NX_expander.slider("Net exports", min_value=10, max_value=100, value=50, key='NX')
+        9. **Interpreting Equilibrium Points:** The intersection of any line with the 45-degree line represents the Keynesian equilibrium point.
 
+        """)
 
+    equilibrium_panel(live)
+
+
+# Moving a slider reruns only this panel, not the page around it
+@fragment("Simulation-1/equilibrium")
+def equilibrium_panel(live):
+    with controls('sim_controls', live):
+        cols = st.columns(3)
+        c0 = cols[0].slider("Autonomous Consumption", min_value=0, max_value=100, value=100, key='c0')
+        c1 = cols[1].slider("Marginal Propensity to Consume", min_value=0.0, max_value=1.0, value=0.5, step=0.1, key='c1')
+        T = cols[2].slider("Taxation", min_value=0, max_value=100, value=20, key='t0')
+        I = cols[0].slider("Investment", min_value=10, max_value=100, value=50, key='I')
+        G = cols[1].slider("Government spending", min_value=10, max_value=100, value=50, key='G')
+        NX = cols[2].slider("Net exports", min_value=10, max_value=100, value=50, key='NX')
+
+    with span("render"):
+        png = render_equilibrium(c0, c1, T, I, G, NX)
+    with span("st.image"):
+        st.image(png)  # Display the plot in streamlit
+
+    with span("equilibrium"):
+        equilibria = lump_sum_equilibrium(c0, c1, T, I, G, NX)
+    if np.isfinite(equilibria['multiplier']):
+        st.write(f"Equilibrium output: {equilibria['C + I + G + NX']:.1f} "
+                 f"(multiplier {equilibria['multiplier']:.2f})")
+    else:
+        st.warning("With a marginal propensity to consume of 1 there is no equilibrium: "
+                   "aggregate demand runs parallel to the 45 degree line.")
+
+
+# Same slider values, same picture: rendered PNGs are reused across reruns and sessions
+@track_cache("sim.render_equilibrium", functools.lru_cache(maxsize=RENDER_CACHE_SIZE))
+def render_equilibrium(c0, c1, T, I, G, NX):
+    # Equilibria come from the closed form; the plot range stretches to show them
+    equilibria = lump_sum_equilibrium(c0, c1, T, I, G, NX)
+    apply_style()
 
     # Income/output range
-    Y = np.linspace(0, 700, 100)
+    Y = output_range([equilibria[curve] for curve in CURVES])
 
     # 45-degree line for Y = AD
     degree45_line = Y
 
     # Create the plot
-    plt.figure(figsize=(10, 10))
+    fig = Figure(figsize=(10, 10))
+    ax = fig.subplots()
 
     # Define aggregate demands
-    AD_C = (c0 - T) + c1*Y
-    AD_C_I = (c0 - T) + c1*Y + I
-    AD_C_I_G = (c0 - T) + c1*Y + I + G
-    AD_C_I_G_NX = (c0 - T) + c1*Y + I + G + NX
-
-
-    # Plot for C only
-    plt.plot(Y, AD_C, label='C (After Tax)')
-    # Equilibrium point
-    eq_x = np.interp(0, AD_C[::-1] - Y[::-1], Y[::-1])
-    plt.annotate(f"Equilibrium (C (After Tax)",
-                (eq_x, eq_x),
-                textcoords="offset points", xytext=(-10,-10),
-                ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
-    
-    # Plot for C + I
-    plt.plot(Y, AD_C_I, label='C + I (After Tax)')
-    # Equilibrium point
-    plt.annotate(f"Equilibrium (C + I (After Tax))",
-                (np.interp(0, AD_C_I[::-1] - Y[::-1], Y[::-1]), np.interp(0, AD_C_I[::-1] - Y[::-1], Y[::-1])),
-                textcoords="offset points", xytext=(-10,-10),
-                ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
-
-    # Plot for C + I + G
-    plt.plot(Y, AD_C_I_G, label='C + I + G (After Tax)')
-    # Equilibrium point
-    plt.annotate(f"Equilibrium (C + I + G (After Tax))",
-                (np.interp(0, AD_C_I_G[::-1] - Y[::-1], Y[::-1]), np.interp(0, AD_C_I_G[::-1] - Y[::-1], Y[::-1])),
-                textcoords="offset points", xytext=(-10,-10),
-                ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
-
-    # Plot for C + I + G + NX
-    plt.plot(Y, AD_C_I_G_NX, label='C + I + G + NX (After Tax)')
-    # Equilibrium point
-    plt.annotate(f"Equilibrium (C + I + G + NX (After Tax))",
-                (np.interp(0, AD_C_I_G_NX[::-1] - Y[::-1], Y[::-1]), np.interp(0, AD_C_I_G_NX[::-1] - Y[::-1], Y[::-1])),
-                textcoords="offset points", xytext=(-10,-10),
-                ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
+    AD = {'C': (c0 - T) + c1*Y}
+    AD['C + I'] = AD['C'] + I
+    AD['C + I + G'] = AD['C + I'] + G
+    AD['C + I + G + NX'] = AD['C + I + G'] + NX
+
+    for curve in CURVES:
+        ax.plot(Y, AD[curve], label=f'{curve} (After Tax)')
+        # Equilibrium point
+        eq_x = equilibria[curve]
+        if np.isfinite(eq_x):
+            ax.annotate(f"Equilibrium ({curve} (After Tax))",
+                        (eq_x, eq_x),
+                        textcoords="offset points", xytext=(-10,-10),
+                        ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
 
     # Plot the 45-degree line
-    plt.plot(Y, degree45_line, label='45 degree line (Y = AD)', linestyle='--', color='k')
-
-    plt.xlabel('Income / Output (Y)')
-    plt.ylabel('Aggregate Demand (AD)')
-    plt.title('Keynesian Equilibrium')
-    plt.legend()
-    plt.grid(True)
-
-    st.pyplot(plt.gcf())  # Display the plot in streamlit
+    ax.plot(Y, degree45_line, label='45 degree line (Y = AD)', linestyle='--', color='k')
 
+    ax.set_xlabel('Income / Output (Y)')
+    ax.set_ylabel('Aggregate Demand (AD)')
+    ax.set_title('Keynesian Equilibrium')
+    ax.legend()
+    ax.grid(True)
 
+    return png_bytes(fig)
@@ -1,76 +1,93 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set(color_codes=True)
+from matplotlib.figure import Figure
 import numpy as np
+import functools
+
+from config import LIVE_UPDATES
+from model import CURVES, output_range, proportional_equilibrium
+from instrumentation import span, track_cache
+from plotting import RENDER_CACHE_SIZE, apply_style, png_bytes
+from sweep_view import render_sweep
+from dynamics_view import render_dynamics
+from ui import controls, fragment
 
 def run_sim2_app():
     st.subheader("Interactive Keynesian Equilibrium Plot-2")
 
+    mode = st.sidebar.radio("Mode", ["Single configuration", "Parameter sweep", "Dynamic path"], key='mode')
+    if mode == "Parameter sweep":
+        render_sweep('proportional')
+        return
+
+    live = st.sidebar.checkbox("Update while adjusting", value=LIVE_UPDATES, key='live')
+
     instructions_expander = st.expander("**Instructions**")
     with instructions_expander:
         st.markdown("""
-        1. **Autonomous Consumption (C0):** Use the slider on the left sidebar to adjust the level of autonomous consumption (C0).
+        1. **Autonomous Consumption (C0):** Use the slider above the chart to adjust the level of autonomous consumption (C0).
         2. **Marginal Propensity to Consume (C1):** Adjust the slider to set the value of C1. 
         3. **Taxation Rate (tax_rate):** Adjust the slider to set the tax rate.
         4. **Investment (I):** Use the slider labeled "Investment" to adjust the level of investment (I).
         5. **Government Spending (G):** Adjust the slider to set the level of government spending (G).
         6. **Propensity to Import (M1):** Use the slider to adjust the propensity to import (M1).
         7. **Exports (X):** Adjust the slider to set the level of exports (X).
-        8. **Interpreting the Chart:** The plot shows different levels of aggregate demand (AD) based on the selected values of C0, C1, I, G, M1, M, and X.
-        9. **Interpreting Equilibrium Points:** The intersection of any line with the 45-degree line represents the Keynesian equilibrium point.
+        8. **Applying Changes:** Make your changes with the sliders, then press **Apply** to redraw the charts once. Tick "Update while adjusting" in the sidebar to redraw on every slider move instead.
+        9. **Interpreting the Chart:** The plot shows different levels of aggregate demand (AD) based on the selected values of C0, C1, I, G, M1, M, and X.
+        10. **Interpreting Equilibrium Points:** The intersection of any line with the 45-degree line represents the Keynesian equilibrium point.
         """)
 
-    c0_expander = st.sidebar.expander("Autonomous Consumption")
-    c0 = c0_expander.slider("Autonomous Consumption", min_value=0, max_value=200, value=50, key='c0')
-
-    c1_expander = st.sidebar.expander("Marginal Propensity to Consume")
-    c1 = c1_expander.slider("Marginal Propensity to Consume", min_value=0.0, max_value=1.0, value=0.75, step=0.1, key='c1')
-
-    tax_rate_expander = st.sidebar.expander("Taxation Rate")
-    tax_rate = tax_rate_expander.slider("Taxation Rate", min_value=0.0, max_value=1.0, value=0.25, step=0.1, key='tax_rate')
-
-    I_expander = st.sidebar.expander("Investment")
-    I = I_expander.slider("Investment", min_value=10, max_value=200, value=50, key='I')
-
-    G_expander = st.sidebar.expander("Government Spending")
-    G = G_expander.slider("Government Spending", min_value=10, max_value=200, value=50, key='G')
-
-    M1_expander = st.sidebar.expander("Propensity to Import")
-    M1 = M1_expander.slider("Propensity to Import", min_value=0.0, max_value=1.0, value=0.1, step=0.1, key='M1')
-
-    X_expander = st.sidebar.expander("Exports")
-    X = X_expander.slider("Exports", min_value=0, max_value=200, value=100, key='X')
-
-    # Calculate T based on the given conditions
-    def calculate_T(Y):
-        return tax_rate * Y
-
-    # Calculate C, Imports, and NX based on the given conditions
-    def calculate_C(Y):
-        T = calculate_T(Y)
-        return c0 + c1 * (Y - T)
-
-    def calculate_Imports(Y):
-        T = calculate_T(Y)
-        return M1 * (Y - T)
-
-    def calculate_NX(Y):
-        Imports = calculate_Imports(Y)
-        return X - Imports
-
-    # Calculate AD based on the given conditions
-    def calculate_AD(Y):
-        C = calculate_C(Y)
-        Imports = calculate_Imports(Y)
-        NX = calculate_NX(Y)
-        return C + I + G + NX
+    equilibrium_panel(mode, live)
+
+
+# Moving a slider reruns only this panel, not the page around it
+@fragment("Simulation-2/equilibrium")
+def equilibrium_panel(mode, live):
+    with controls('sim2_controls', live):
+        cols = st.columns(4)
+        c0 = cols[0].slider("Autonomous Consumption", min_value=0, max_value=200, value=50, key='c0')
+        c1 = cols[1].slider("Marginal Propensity to Consume", min_value=0.0, max_value=1.0, value=0.75, step=0.1, key='c1')
+        tax_rate = cols[2].slider("Taxation Rate", min_value=0.0, max_value=1.0, value=0.25, step=0.1, key='tax_rate')
+        M1 = cols[3].slider("Propensity to Import", min_value=0.0, max_value=1.0, value=0.1, step=0.1, key='M1')
+        I = cols[0].slider("Investment", min_value=10, max_value=200, value=50, key='I')
+        G = cols[1].slider("Government Spending", min_value=10, max_value=200, value=50, key='G')
+        X = cols[2].slider("Exports", min_value=0, max_value=200, value=100, key='X')
+
+    if mode == "Dynamic path":
+        render_dynamics(c0, c1, tax_rate, I, G, X, M1)
+        return
+
+    with span("render"):
+        png = render_equilibrium(c0, c1, tax_rate, I, G, X, M1)
+    with span("st.image"):
+        st.image(png)  # Display the plot in streamlit
+
+    with span("equilibrium"):
+        equilibria = proportional_equilibrium(c0, c1, tax_rate, I, G, X, M1)
+    if np.isfinite(equilibria['multiplier']):
+        st.write(f"Equilibrium output: {equilibria['C + I + G + NX']:.1f} "
+                 f"(multiplier {equilibria['multiplier']:.2f})")
+    else:
+        st.warning("No equilibrium: aggregate demand runs parallel to the 45-degree line.")
+
+    with span("render_savings_investment"):
+        png = render_savings_investment(c0, c1, tax_rate, I, G)
+    with span("st.image"):
+        st.image(png)  # Display the plot in streamlit
+
+
+# Same slider values, same picture: rendered PNGs are reused across reruns and sessions
+@track_cache("sim2.render_equilibrium", functools.lru_cache(maxsize=RENDER_CACHE_SIZE))
+def render_equilibrium(c0, c1, tax_rate, I, G, X, M1):
+    # Equilibria come from the closed form; the plot range stretches to show them
+    equilibria = proportional_equilibrium(c0, c1, tax_rate, I, G, X, M1)
+    apply_style()
 
     # Create the plot
-    plt.figure(figsize=(10, 10))
+    fig = Figure(figsize=(10, 10))
+    ax = fig.subplots()
 
     # Income/output range
-    Y = np.linspace(0, 700, 100)
+    Y = output_range([equilibria[curve] for curve in CURVES])
     T = tax_rate * Y
 
     # Calculate the components
@@ -79,41 +96,40 @@ def run_sim2_app():
     G_arr = np.full_like(Y, G)
     NX = X - M1 * (Y - T)
 
-    # Plot the lines
-    plt.plot(Y, C, label='C')
-    plt.plot(Y, C + I_arr, label='C + I')
-    plt.plot(Y, C + I_arr + G_arr, label='C + I + G')
-    plt.plot(Y, C + I_arr + G_arr + NX, label='C + I + G + NX')
-
-    # Calculate Equilibrium Points and Annotate
+    # Plot the lines and annotate the equilibrium points
     for curve, label in [(C, 'C'), (C + I_arr, 'C + I'), (C + I_arr + G_arr, 'C + I + G'), (C + I_arr + G_arr + NX, 'C + I + G + NX')]:
-        eq_x = np.interp(0, curve[::-1] - Y[::-1], Y[::-1])
-        plt.annotate(f'Equilibrium ({label})',
-                     (eq_x, eq_x),
-                     textcoords="offset points", xytext=(-10,-10),
-                     ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
+        ax.plot(Y, curve, label=label)
+        eq_x = equilibria[label]
+        if np.isfinite(eq_x):
+            ax.annotate(f'Equilibrium ({label})',
+                        (eq_x, eq_x),
+                        textcoords="offset points", xytext=(-10,-10),
+                        ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
 
     # Plot the 45-degree line
-    plt.plot(Y, Y, label='45-degree line (Y = AD)', linestyle='--', color='k')
-
-    plt.xlabel('Income / Output (Y)')
-    plt.ylabel('Aggregate Demand (AD)')
-    plt.title('Keynesian Equilibrium')
-    plt.legend()
-    plt.grid(True)
-
-    st.pyplot(plt.gcf())  # Display the plot in streamlit
+    ax.plot(Y, Y, label='45-degree line (Y = AD)', linestyle='--', color='k')
 
+    ax.set_xlabel('Income / Output (Y)')
+    ax.set_ylabel('Aggregate Demand (AD)')
+    ax.set_title('Keynesian Equilibrium')
+    ax.legend()
+    ax.grid(True)
 
+    return png_bytes(fig)
 
 
+@track_cache("sim2.render_savings_investment", functools.lru_cache(maxsize=RENDER_CACHE_SIZE))
+def render_savings_investment(c0, c1, tax_rate, I, G):
+    # S = I meets where C + I + G meets the 45-degree line
+    eq_x = proportional_equilibrium(c0, c1, tax_rate, I, G, 0, 0)['S = I']
+    apply_style()
 
-
-        # Create the plot
-    plt.figure(figsize=(10, 10))
+    # Create the plot
+    fig = Figure(figsize=(10, 10))
+    ax = fig.subplots()
 
     # Income/output range
-    Y = np.linspace(0, 700, 100)
+    Y = output_range([eq_x])
     T = tax_rate * Y
 
     # Calculate the components
@@ -121,24 +137,23 @@ def run_sim2_app():
     I_arr = np.full_like(Y, I)
 
     # Calculate Savings
-    S = Y - C - G_arr
+    S = Y - C - G
 
     # Plot the lines
-    plt.plot(Y, S, label='Savings (S)')
-    plt.plot(Y, I_arr, label='Investment (I)')
-
-    # Calculate Equilibrium Point and Annotate
-    eq_x = np.interp(I, S[::-1], Y[::-1])
-    plt.annotate(f'Equilibrium (S = I)',
-                 (eq_x, I),
-                 textcoords="offset points", xytext=(-10,-10),
-                 ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
-
-    plt.xlabel('Income / Output (Y)')
-    plt.ylabel('Savings / Investment')
-    plt.title('Savings-Investment vs Income')
-    plt.legend()
-    plt.grid(True)
-
-    st.pyplot(plt.gcf())  # Display the plot in streamlit
-
+    ax.plot(Y, S, label='Savings (S)')
+    ax.plot(Y, I_arr, label='Investment (I)')
+
+    # Annotate the Equilibrium Point
+    if np.isfinite(eq_x):
+        ax.annotate(f'Equilibrium (S = I)',
+                    (eq_x, I),
+                    textcoords="offset points", xytext=(-10,-10),
+                    ha='center', arrowprops=dict(facecolor='black', arrowstyle="->"))
+
+    ax.set_xlabel('Income / Output (Y)')
+    ax.set_ylabel('Savings / Investment')
+    ax.set_title('Savings-Investment vs Income')
+    ax.legend()
+    ax.grid(True)
+
+    return png_bytes(fig)
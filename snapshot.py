@@ -0,0 +1,129 @@
+import itertools
+import json
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+
+import numpy as np
+
+from config import SNAPSHOT_DIR
+from panel import Panel
+
+
+# Layout of a built snapshot, one folder per table and release:
+#
+#   <root>/<name>/CURRENT                 name of the live version folder
+#   <root>/<name>/<version>/manifest.json table, release, components, metrics
+#   <root>/<name>/<version>/dates.npy     datetime64[ns], sorted
+#   <root>/<name>/<version>/values.npy    float64, dates x components
+#   <root>/<name>/<version>/<metric>.npy  one per entry of panel.metrics
+#
+# A version folder is never changed once CURRENT may point at it: rebuilding a
+# release writes "<version>.1", "<version>.2", ... next to it.
+CURRENT = 'CURRENT'
+
+# Version folders kept per table, newest first, the live one always included;
+# readers still on an older one keep their open maps after it is removed
+KEEP_VERSIONS = 3
+
+
+def version_name(release):
+    # "2024-08-30T08:30" -> "20240830T0830", safe as a folder name anywhere
+    return re.sub(r'[^0-9A-Za-z]+', '', release)
+
+
+def write_snapshot(name, panel, root=None):
+    # Save the panel and its metrics as plain .npy files under a new version
+    # folder, point CURRENT at it and drop all but the KEEP_VERSIONS newest.
+    root = pathlib.Path(root or SNAPSHOT_DIR) / name
+    version = version_name(panel.vintage)
+    root.mkdir(parents=True, exist_ok=True)
+    workdir = pathlib.Path(tempfile.mkdtemp(dir=root, prefix='.build-'))
+    try:
+        np.save(workdir / 'dates.npy', np.ascontiguousarray(panel.dates, dtype='datetime64[ns]'))
+        np.save(workdir / 'values.npy', np.ascontiguousarray(panel.values, dtype='float64'))
+        for metric, values in panel.metrics.items():
+            np.save(workdir / f'{metric}.npy', np.ascontiguousarray(values))
+        with open(workdir / 'manifest.json', 'w') as f:
+            json.dump({'table': name, 'release': panel.vintage, 'components': panel.components,
+                       'metrics': list(panel.metrics), 'shape': list(panel.values.shape)}, f)
+        target = _rename_free(workdir, root, version)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    fd, tmp = tempfile.mkstemp(dir=root, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(target.name)
+    os.replace(tmp, root / CURRENT)
+    _prune(root, target.name)
+    return target
+
+
+def _rename_free(workdir, root, version):
+    # Move the built folder to the first unused name of `version`; renaming
+    # onto an existing folder fails instead of replacing it
+    for n in itertools.count():
+        target = root / (version if n == 0 else f'{version}.{n}')
+        if target.exists():
+            continue
+        try:
+            os.rename(workdir, target)
+            return target
+        except OSError:
+            if not target.exists():
+                raise
+
+
+def _prune(root, live, keep=KEEP_VERSIONS):
+    # Remove version folders beyond the `keep` most recently built, never
+    # the live one and never a build in progress
+    folders = [p for p in root.iterdir() if p.is_dir() and not p.name.startswith('.') and p.name != live]
+    folders.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    for folder in folders[keep - 1:]:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def load_snapshot(name, root=None):
+    # The live version as a Panel over read-only memory maps, so every
+    # process on the host shares the page cache instead of its own copy.
+    # Returns None when no snapshot has been built. A version pruned by a
+    # build between reading CURRENT and mapping its files is retried once
+    # from the new CURRENT.
+    root = pathlib.Path(root or SNAPSHOT_DIR) / name
+    for _ in range(2):
+        try:
+            return _load_version(root, (root / CURRENT).read_text().strip())
+        except FileNotFoundError:
+            if not (root / CURRENT).is_file():
+                return None
+    return None
+
+
+def _load_version(root, version):
+    folder = root / version
+    with open(folder / 'manifest.json') as f:
+        manifest = json.load(f)
+    load = lambda stem: np.load(folder / f'{stem}.npy', mmap_mode='r')
+    return Panel(load('dates'), manifest['components'], load('values'),
+                 {metric: load(metric) for metric in manifest['metrics']}, manifest['release'])
+
+
+def build_snapshots(names=None, downloader=None, cache_dir=None, root=None):
+    # Fetch and clean the registered tables, compute their metrics and write
+    # a snapshot of each, recording the release in the vintage store too.
+    # Returns {name: version folder}.
+    from datasets import REGISTRY, load_datasets
+    from metrics import compute_metrics
+    from table_cache import read_manifest
+    from vintages import record_vintage
+
+    built = {}
+    for name, df in load_datasets(names, downloader=downloader, cache_dir=cache_dir).items():
+        panel = Panel.from_frame(df)
+        panel.metrics = compute_metrics(panel.values, REGISTRY[name].periods_per_year)
+        panel.vintage = read_manifest(name, cache_dir)['release']
+        built[name] = write_snapshot(name, panel, root)
+        record_vintage(name, panel, cache_dir and pathlib.Path(cache_dir) / 'vintages')
+    return built
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pathlib
+
+import numpy as np
+
+from parallel import map_chunks
+from table_cache import _write_atomic
+from model import (lump_sum_equilibrium, lump_sum_partials,
+                   proportional_equilibrium, proportional_partials)
+
+
+# Parameters of each model in call order, with the solver and its derivatives
+MODELS = {
+    'lump_sum': (('c0', 'c1', 'T', 'I', 'G', 'NX'), lump_sum_equilibrium, lump_sum_partials),
+    'proportional': (('c0', 'c1', 'tax_rate', 'I', 'G', 'X', 'M1'),
+                     proportional_equilibrium, proportional_partials),
+}
+
+# Grid points handed to one worker at a time; bounds per-task memory
+CHUNK_SIZE = 1_000_000
+
+# Largest grid a sweep may have. Results go straight to a file on disk, chunk
+# by chunk, so this bounds disk use (80 MB per array at the limit) and time
+# rather than memory.
+MAX_GRID_POINTS = 10_000_000
+
+# Total size of saved sweeps; the least recently used files go first. Holds a
+# few sweeps at MAX_GRID_POINTS over every parameter of either model.
+SWEEP_CACHE_BYTES = 2 * 2**30
+
+
+def sweep_spec(model, ranges, fixed):
+    # Hashable description of a sweep. `ranges` maps swept parameters to
+    # (low, high, points) in grid-axis order, `fixed` gives the others.
+    params = MODELS[model][0]
+    axes = tuple((name, float(lo), float(hi), int(n)) for name, (lo, hi, n) in ranges.items())
+    unknown = set(ranges) - set(params)
+    if unknown:
+        raise ValueError(f"{model} has no parameters {sorted(unknown)}")
+    points = int(np.prod([n for *_, n in axes]))
+    if points > MAX_GRID_POINTS:
+        raise ValueError(f"{points:,} grid points is more than the {MAX_GRID_POINTS:,} allowed")
+    rest = tuple((name, float(fixed[name])) for name in params if name not in ranges)
+    return (model, axes, rest)
+
+
+def grid_shape(spec):
+    return tuple(n for _, _, _, n in spec[1])
+
+
+def _evaluate(spec, path, start, stop):
+    # Equilibrium output and its partials for flat grid points [start, stop),
+    # written into their rows of the sweep file at `path`
+    model, axes, rest = spec
+    _, equilibrium, partials = MODELS[model]
+    index = np.unravel_index(np.arange(start, stop), grid_shape(spec))
+    args = dict(rest)
+    for (name, lo, hi, n), i in zip(axes, index):
+        args[name] = np.linspace(lo, hi, n)[i]
+    output = equilibrium(**args)['C + I + G + NX']
+    derivatives = partials(**args)
+    grid = np.load(path, mmap_mode='r+')
+    grid[0, start:stop] = output
+    for row, (name, *_) in enumerate(axes, 1):
+        grid[row, start:stop] = derivatives[name]
+    grid.flush()
+    return start, stop
+
+
+def run_sweep(spec, path, max_workers=None, chunk_size=CHUNK_SIZE):
+    # Evaluate the whole grid into a .npy file at `path`: one row for the
+    # output and one per swept parameter's partial, over the flattened grid.
+    # Chunks are spread over a process pool and each worker writes its own
+    # columns, so no process holds more than a chunk.
+    total = int(np.prod(grid_shape(spec)))
+    grid = np.lib.format.open_memmap(path, mode='w+', dtype='float64', shape=(1 + len(spec[1]), total))
+    del grid  # header and size are on disk; workers open it themselves
+    bounds = [(s, min(s + chunk_size, total)) for s in range(0, total, chunk_size)]
+    map_chunks(_evaluate, [(spec, str(path), start, stop) for start, stop in bounds],
+               lambda result: None, max_workers)
+
+
+def open_sweep(spec, path):
+    # A sweep file as {'axes', 'output', 'partials'} over a read-only memory
+    # map, each array shaped like the grid; slicing one reads only its pages
+    shape = grid_shape(spec)
+    grid = np.load(path, mmap_mode='r')
+    return {'axes': {name: np.linspace(lo, hi, n) for name, lo, hi, n in spec[1]},
+            'output': grid[0].reshape(shape),
+            'partials': {name: grid[row].reshape(shape) for row, (name, *_) in enumerate(spec[1], 1)}}
+
+
+def _evaluate_rows(model, columns, start):
+    # Every equilibrium and all partials for a block of parameter rows
+    _, equilibrium, partials = MODELS[model]
+    results = equilibrium(**columns)
+    results.update(('dY/d' + name, d) for name, d in partials(**columns).items())
+    n = len(next(iter(columns.values())))
+    return start, {name: np.broadcast_to(r, n) for name, r in results.items()}
+
+
+def run_batch(model, columns, max_workers=None, chunk_size=CHUNK_SIZE):
+    # Evaluate many independent configurations. `columns` maps every
+    # parameter of the model to an array with one entry per row; returns
+    # {result name: array} with the model's curves, multiplier and partials.
+    params = MODELS[model][0]
+    missing = set(params) - set(columns)
+    if missing:
+        raise ValueError(f"{model} needs parameters {sorted(missing)}")
+    columns = {name: np.asarray(columns[name], dtype='float64') for name in params}
+    total = len(columns[params[0]])
+    results = {}
+
+    def store(result):
+        start, block = result
+        for name, values in block.items():
+            out = results.setdefault(name, np.empty(total))
+            out[start:start + len(values)] = values
+
+    tasks = [(model, {name: c[s:s + chunk_size] for name, c in columns.items()}, s)
+             for s in range(0, total, chunk_size)]
+    map_chunks(_evaluate_rows, tasks, store, max_workers)
+    return results
+
+
+def cached_sweep(spec, cache_dir, max_workers=None):
+    # The sweep file for `spec` under cache_dir, computed by run_sweep unless
+    # an identical spec was saved before, opened with open_sweep. Each run
+    # writes a temp file of its own, so processes racing on one spec don't clash.
+    path = pathlib.Path(cache_dir) / ('sweep-' + hashlib.sha1(repr(spec).encode()).hexdigest() + '.npy')
+    if path.is_file():
+        os.utime(path)  # mark as recently used for _prune
+        return open_sweep(spec, path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(path, lambda tmp: run_sweep(spec, tmp, max_workers=max_workers))
+    result = open_sweep(spec, path)
+    _prune(path.parent, SWEEP_CACHE_BYTES)
+    return result
+
+
+def _prune(cache_dir, max_bytes):
+    # Delete the least recently used saved sweeps until the rest fit in max_bytes;
+    # sessions still mapping a deleted one keep reading it
+    files = []
+    for path in pathlib.Path(cache_dir).glob('sweep-*.npy'):
+        try:
+            files.append((path.stat(), path))
+        except FileNotFoundError:  # pruned by another process
+            pass
+    total = 0
+    for stat, path in sorted(files, key=lambda f: f[0].st_mtime, reverse=True):
+        total += stat.st_size
+        if total > max_bytes:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,118 @@
+import streamlit as st
+from matplotlib.figure import Figure
+import numpy as np
+
+from instrumentation import span, track_cache
+from plotting import apply_style, png_bytes
+from sweep import MAX_GRID_POINTS, MODELS, cached_sweep, sweep_spec
+from ui import fragment
+from config import CACHE_DIR
+
+
+# Slider bounds and defaults of the simulation pages: (low, high, default)
+PARAMETERS = {
+    'lump_sum': {'c0': (0, 100, 100), 'c1': (0.0, 0.95, 0.5), 'T': (0, 100, 20),
+                 'I': (10, 100, 50), 'G': (10, 100, 50), 'NX': (10, 100, 50)},
+    'proportional': {'c0': (0, 200, 50), 'c1': (0.0, 0.95, 0.75), 'tax_rate': (0.0, 0.9, 0.25),
+                     'I': (10, 200, 50), 'G': (10, 200, 50), 'X': (0, 200, 100),
+                     'M1': (0.0, 0.9, 0.1)},
+}
+
+
+# Shared by all sessions: one computation per spec, backed by the disk cache
+@track_cache("load_sweep", st.cache_resource(max_entries=8))
+def load_sweep(spec):
+    return cached_sweep(spec, CACHE_DIR / 'sweeps')
+
+
+def _surface(result, spec, x, y, at, wrt):
+    # 2-D slices of the output and the dY/d`wrt` partial through the grid,
+    # with the other swept axes held at the chosen indices. The result is
+    # memory-mapped, so only these slices are read from disk.
+    names = [name for name, *_ in spec[1]]
+    index = tuple(slice(None) if name in (x, y) else at[name] for name in names)
+    transpose = names.index(x) < names.index(y)
+    cut = lambda a: np.array(a[index].T if transpose else a[index])
+    return cut(result['output']), cut(result['partials'][wrt])
+
+
+def _heatmap(ax, xs, ys, z, title, xlabel, ylabel):
+    z = np.ma.masked_invalid(z)
+    mesh = ax.pcolormesh(xs, ys, z, shading='auto', cmap='viridis')
+    if z.count() and np.ptp(z.compressed()) > 0:
+        contours = ax.contour(xs, ys, z, levels=8, colors='white', linewidths=0.8)
+        ax.clabel(contours, fontsize=8)
+    ax.figure.colorbar(mesh, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+
+@fragment("sweep")
+def render_sweep(model):
+    params = MODELS[model][0]
+    bounds = PARAMETERS[model]
+
+    swept = st.multiselect("Parameters to sweep", params, default=list(params[1:3]), key=f'{model}_swept')
+    if not swept:
+        st.info("Choose at least one parameter to sweep.")
+        return
+
+    ranges, fixed = {}, {}
+    for name in params:
+        low, high, default = bounds[name]
+        if name in swept:
+            cols = st.columns([3, 1])
+            lo, hi = cols[0].slider(f"{name} range", low, high, (low, high), key=f'{model}_{name}_range')
+            n = cols[1].number_input("points", 2, 5000, 100, key=f'{model}_{name}_points')
+            ranges[name] = (lo, hi, n)
+        else:
+            fixed[name] = st.number_input(name, low, high, default, key=f'{model}_{name}_fixed')
+
+    points = int(np.prod([n for _, _, n in ranges.values()]))
+    if points > MAX_GRID_POINTS:
+        st.error(f"{points:,} grid points is more than the {MAX_GRID_POINTS:,} allowed; "
+                 "use fewer points or sweep fewer parameters.")
+        return
+    spec = sweep_spec(model, ranges, fixed)
+    st.caption(f"{points:,} grid points")
+    with span("sweep"):
+        result = load_sweep(spec)
+    apply_style()
+
+    if len(swept) == 1:
+        fig = Figure(figsize=(12, 5))
+        axes = fig.subplots(1, 2)
+        x = result['axes'][swept[0]]
+        axes[0].plot(x, result['output'])
+        axes[0].set_title('Equilibrium output (Y)')
+        axes[1].plot(x, result['partials'][swept[0]])
+        axes[1].set_title(f'Multiplier dY/d{swept[0]}')
+        for ax in axes:
+            ax.set_xlabel(swept[0])
+            ax.grid(True)
+        with span("render"):
+            png = png_bytes(fig)
+        st.image(png)
+        return
+
+    cols = st.columns(2)
+    x = cols[0].selectbox("Horizontal axis", swept, index=0, key=f'{model}_x')
+    y = cols[1].selectbox("Vertical axis", [p for p in swept if p != x], index=0, key=f'{model}_y')
+    at = {}
+    for name in swept:
+        if name not in (x, y):
+            axis = result['axes'][name]
+            value = st.select_slider(f"{name} held at", options=list(np.round(axis, 4)), key=f'{model}_{name}_at')
+            at[name] = int(np.argmin(np.abs(axis - value)))
+    wrt = st.selectbox("Multiplier with respect to", swept, key=f'{model}_wrt')
+
+    output, partial = _surface(result, spec, x, y, at, wrt)
+    xs, ys = result['axes'][x], result['axes'][y]
+    fig = Figure(figsize=(14, 6))
+    axes = fig.subplots(1, 2)
+    with span("render"):
+        _heatmap(axes[0], xs, ys, output, 'Equilibrium output (Y)', x, y)
+        _heatmap(axes[1], xs, ys, partial, f'Multiplier dY/d{wrt}', x, y)
+        png = png_bytes(fig)
+    st.image(png)
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+
+import pandas as pd
+
+from config import CACHE_DIR as DEFAULT_CACHE_DIR, FIXTURE_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+def product_id(table_id):
+    # "36-10-0104-01" -> "36100104", the name StatsCan uses for its files
+    # (same rule as stats_can.helpers.parse_tables, without importing stats_can)
+    return re.sub(r"\D", "", table_id)[:8]
+
+
+class StatsCanDownloader:
+    # Talks to the StatsCan web data service
+
+    def release(self, table_id):
+        from stats_can.scwds import get_cube_metadata
+
+        meta = get_cube_metadata([table_id])[0]
+        return meta["releaseTime"]
+
+    def fetch(self, table_id, folder):
+        from stats_can.sc import download_tables
+
+        download_tables([table_id], folder)
+        return pathlib.Path(folder) / (product_id(table_id) + "-eng.zip")
+
+
+class FixtureDownloader:
+    # Serves "<pid>-eng.zip" and "<pid>.json" from a local folder, so the
+    # StatsCan endpoint can be swapped out offline
+
+    def __init__(self, folder):
+        self.folder = pathlib.Path(folder)
+
+    def release(self, table_id):
+        with open(self.folder / (product_id(table_id) + ".json")) as f:
+            return json.load(f)["releaseTime"]
+
+    def fetch(self, table_id, folder):
+        name = product_id(table_id) + "-eng.zip"
+        return pathlib.Path(shutil.copy(self.folder / name, pathlib.Path(folder) / name))
+
+
+def default_downloader():
+    return FixtureDownloader(FIXTURE_DIR) if FIXTURE_DIR else StatsCanDownloader()
+
+
+def _paths(cache_dir, key):
+    cache_dir = pathlib.Path(cache_dir)
+    return cache_dir / (key + ".parquet"), cache_dir / (key + ".json")
+
+
+def read_manifest(key, cache_dir=None):
+    _, manifest = _paths(cache_dir or DEFAULT_CACHE_DIR, key)
+    if not manifest.is_file():
+        return None
+    with open(manifest) as f:
+        return json.load(f)
+
+
+def _write_atomic(path, write):
+    # write to a temp file next to the target, then swap it in
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=path.suffix + ".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_table(table_id, parse, downloader=None, cache_dir=None, key=None, fingerprint=None):
+    # Return the parsed table from the on-disk cache, refreshing it only when
+    # StatsCan reports a different release or `fingerprint` (a string naming
+    # how `parse` cleans the table) changed since it was stored. `parse` turns
+    # the downloaded zip into the frame that gets stored. If the release check
+    # or the download fails, the last good snapshot is served instead.
+    downloader = downloader or default_downloader()
+    cache_dir = pathlib.Path(cache_dir or DEFAULT_CACHE_DIR)
+    key = key or product_id(table_id)
+    data_path, manifest_path = _paths(cache_dir, key)
+    manifest = read_manifest(key, cache_dir)
+    have_snapshot = manifest is not None and data_path.is_file()
+
+    try:
+        release = downloader.release(table_id)
+        if have_snapshot and manifest["release"] == release and manifest.get("fingerprint") == fingerprint:
+            return pd.read_parquet(data_path)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=cache_dir) as workdir:
+            df = parse(downloader.fetch(table_id, workdir))
+    except Exception:
+        if not have_snapshot:
+            raise
+        logger.warning("Refreshing %s failed, serving release %s from cache",
+                       table_id, manifest["release"], exc_info=True)
+        return pd.read_parquet(data_path)
+
+    _write_atomic(data_path, lambda tmp: df.to_parquet(tmp, index=False))
+    _write_atomic(manifest_path, lambda tmp: _dump_json(
+        {"table": table_id, "release": release, "rows": len(df), "fingerprint": fingerprint}, tmp))
+    return df
+
+
+def _dump_json(obj, path):
+    with open(path, "w") as f:
+        json.dump(obj, f)
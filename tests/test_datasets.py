@@ -0,0 +1,93 @@
+import dataclasses
+import json
+import threading
+import zipfile
+
+import pandas as pd
+import pytest
+
+from datasets import CPI, GDP, load_dataset, load_datasets
+from table_cache import FixtureDownloader, product_id
+
+
+DATES = ['2023-01', '2023-04', '2023-07']
+
+
+def write_fixture(folder, spec, release='2024-08-30T08:30'):
+    # A tiny "<pid>-eng.zip"/"<pid>.json" pair for `spec`: every date for each
+    # of the first two members, plus rows that miss a filter and rows of a
+    # member the spec does not list, which loading has to drop
+    (dimension, members), = spec.members.items()
+    keep = {**spec.filters, 'GEO': 'Canada'}
+    rows = []
+    for i, date in enumerate(DATES):
+        for member in members[:2]:
+            rows.append({**keep, 'REF_DATE': date, dimension: member, 'VALUE': 100.0 + i})
+        rows.append({**keep, 'REF_DATE': date, dimension: 'Not in the spec', 'VALUE': -1.0})
+        for column in spec.filters:
+            rows.append({**keep, column: 'Some other value', 'REF_DATE': date, dimension: members[0],
+                         'VALUE': -1.0})
+    pid = product_id(spec.table_id)
+    with zipfile.ZipFile(folder / (pid + '-eng.zip'), 'w') as archive:
+        archive.writestr(pid + '.csv', pd.DataFrame(rows).to_csv(index=False))
+    with open(folder / (pid + '.json'), 'w') as f:
+        json.dump({'productId': pid, 'releaseTime': release}, f)
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    folder = tmp_path / 'fixtures'
+    folder.mkdir()
+    for spec in (GDP, CPI):
+        write_fixture(folder, spec)
+    return folder
+
+
+def test_load_datasets_columns_and_categories(fixtures, tmp_path):
+    frames = load_datasets(['gdp', 'cpi'], FixtureDownloader(fixtures), tmp_path / 'cache')
+    assert list(frames) == ['gdp', 'cpi']
+    for spec in (GDP, CPI):
+        df = frames[spec.name]
+        assert list(df.columns) == ['date', 'component', 'value']
+        assert pd.api.types.is_datetime64_any_dtype(df['date'])
+        (members,) = spec.members.values()
+        assert list(df['component'].cat.categories) == members
+
+
+def test_load_datasets_pushes_filters_down(fixtures, tmp_path):
+    frames = load_datasets(['gdp', 'cpi'], FixtureDownloader(fixtures), tmp_path / 'cache')
+    for spec in (GDP, CPI):
+        df = frames[spec.name]
+        (members,) = spec.members.values()
+        assert len(df) == 2 * len(DATES)
+        assert set(df['component']) == set(members[:2])
+        assert (df['value'] > 0).all()
+
+
+def test_load_datasets_fetches_concurrently(fixtures, tmp_path):
+    # Each release check waits for the other table's; run one after the
+    # other, the barrier would time out and the load would fail
+    barrier = threading.Barrier(2, timeout=5)
+
+    class WaitingDownloader(FixtureDownloader):
+        def release(self, table_id):
+            barrier.wait()
+            return super().release(table_id)
+
+    frames = load_datasets(['gdp', 'cpi'], WaitingDownloader(fixtures), tmp_path / 'cache', max_workers=2)
+    assert set(frames) == {'gdp', 'cpi'}
+
+
+def test_load_datasets_raises_the_first_failure(fixtures, tmp_path):
+    (fixtures / (product_id(CPI.table_id) + '-eng.zip')).unlink()
+    with pytest.raises(FileNotFoundError):
+        load_datasets(['gdp', 'cpi'], FixtureDownloader(fixtures), tmp_path / 'cache')
+
+
+def test_editing_a_spec_refetches_it(fixtures, tmp_path):
+    downloader = FixtureDownloader(fixtures)
+    load_datasets(['cpi'], downloader, tmp_path / 'cache')
+    (dimension, members), = CPI.members.items()
+    narrower = dataclasses.replace(CPI, members={dimension: members[:1]})
+    df = load_dataset(narrower, downloader, tmp_path / 'cache')
+    assert set(df['component']) == {'All-items'}
@@ -0,0 +1,28 @@
+import numpy as np
+
+from metrics import compute_metrics
+
+
+def test_compute_metrics_follows_the_table_frequency():
+    # Monthly series growing 1% a month
+    values = 100 * 1.01 ** np.arange(72, dtype='float64')[:, None].repeat(2, axis=1)
+    metrics = compute_metrics(values, periods_per_year=12)
+    assert np.isnan(metrics['yoy'][11]).all()
+    np.testing.assert_allclose(metrics['yoy'][12:], 1.01 ** 12 - 1)
+    np.testing.assert_allclose(metrics['annualized'][1:], 1.01 ** 12 - 1)
+    assert {'corr_24', 'corr_60'} <= set(metrics)
+
+
+def test_compute_metrics_defaults_to_quarterly():
+    metrics = compute_metrics(np.arange(1, 41, dtype='float64')[:, None].repeat(2, axis=1))
+    assert {'corr_8', 'corr_20'} <= set(metrics)
+    assert np.isnan(metrics['yoy'][3]).all() and np.isfinite(metrics['yoy'][4]).all()
+
+
+def test_annual_correlation_windows_reach_min_periods():
+    values = np.cumsum(np.random.default_rng(0).normal(size=(12, 2)), axis=0) + 100
+    metrics = compute_metrics(values, periods_per_year=1)
+    stacks = [name for name in metrics if name.startswith('corr_')]
+    assert stacks == ['corr_3', 'corr_5']
+    for name in stacks:
+        assert np.isfinite(metrics[name][-1]).all()
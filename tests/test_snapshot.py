@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+import snapshot
+from panel import Panel
+from snapshot import CURRENT, KEEP_VERSIONS, load_snapshot, write_snapshot
+
+
+def panel(release, fill=1.0):
+    dates = pd.period_range('2020Q1', periods=4, freq='Q').to_timestamp().to_numpy()
+    return Panel(dates, ['A', 'B'], np.full((4, 2), fill), {'yoy': np.zeros((4, 2))}, release)
+
+
+def test_rebuilding_a_release_leaves_the_live_folder_alone(tmp_path):
+    first = write_snapshot('gdp', panel('2024-08-30T08:30'), tmp_path)
+    held = load_snapshot('gdp', tmp_path)
+    second = write_snapshot('gdp', panel('2024-08-30T08:30', fill=2.0), tmp_path)
+    assert first.name == '20240830T0830' and second.name == '20240830T0830.1'
+    assert first.is_dir()
+    np.testing.assert_array_equal(held.values, 1.0)
+    np.testing.assert_array_equal(load_snapshot('gdp', tmp_path).values, 2.0)
+
+
+def test_old_versions_are_pruned(tmp_path):
+    for month in range(1, 7):
+        write_snapshot('gdp', panel(f'2024-{month:02d}-01T08:30'), tmp_path)
+    folders = sorted(p.name for p in (tmp_path / 'gdp').iterdir() if p.is_dir())
+    assert folders == [f'2024{m:02d}01T0830' for m in range(7 - KEEP_VERSIONS, 7)]
+    assert (tmp_path / 'gdp' / CURRENT).read_text() == '20240601T0830'
+
+
+def test_load_retries_when_the_version_disappears(tmp_path, monkeypatch):
+    write_snapshot('gdp', panel('2024-08-30T08:30'), tmp_path)
+    load_version = snapshot._load_version
+    calls = []
+
+    def racing(root, version):
+        # a build swaps CURRENT and prunes the old folder mid-load
+        if not calls:
+            calls.append(version)
+            write_snapshot('gdp', panel('2024-11-29T08:30', fill=2.0), tmp_path)
+            raise FileNotFoundError(version)
+        return load_version(root, version)
+
+    monkeypatch.setattr(snapshot, '_load_version', racing)
+    assert load_snapshot('gdp', tmp_path).vintage == '2024-11-29T08:30'
+
+
+def test_missing_snapshot_is_none(tmp_path):
+    assert load_snapshot('gdp', tmp_path) is None
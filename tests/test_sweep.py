@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from model import proportional_equilibrium, proportional_partials
+from sweep import MAX_GRID_POINTS, cached_sweep, open_sweep, run_sweep, sweep_spec
+
+
+FIXED = dict(c0=50, I=50, G=50, X=100, M1=0.1)
+
+
+def spec(c1_points=30, tax_points=20):
+    return sweep_spec('proportional', {'c1': (0, 0.9, c1_points), 'tax_rate': (0, 0.9, tax_points)}, FIXED)
+
+
+def test_chunks_on_a_pool_fill_the_whole_grid(tmp_path):
+    s = spec()
+    run_sweep(s, tmp_path / 'grid.npy', max_workers=2, chunk_size=128)
+    result = open_sweep(s, tmp_path / 'grid.npy')
+    c1, tax_rate = np.meshgrid(result['axes']['c1'], result['axes']['tax_rate'], indexing='ij')
+    np.testing.assert_allclose(result['output'],
+                               proportional_equilibrium(c1=c1, tax_rate=tax_rate, **FIXED)['C + I + G + NX'])
+    np.testing.assert_allclose(result['partials']['tax_rate'],
+                               proportional_partials(c1=c1, tax_rate=tax_rate, **FIXED)['tax_rate'])
+
+
+def test_cached_sweep_reuses_the_saved_file(tmp_path):
+    first = cached_sweep(spec(), tmp_path, max_workers=1)
+    second = cached_sweep(spec(), tmp_path, max_workers=1)
+    np.testing.assert_array_equal(first['output'], second['output'])
+    assert [p.suffix for p in tmp_path.iterdir()] == ['.npy']
+
+
+def test_grid_limit():
+    spec(4000, 2500)
+    with pytest.raises(ValueError):
+        spec(MAX_GRID_POINTS, 2)
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from table_cache import load_table, read_manifest
+
+
+TABLE_ID = '36-10-0104-01'
+
+
+class FakeDownloader:
+    # Reports `release` and hands back a placeholder zip, counting fetches;
+    # either call raises `error` when one is set
+    def __init__(self, release):
+        self.release_time = release
+        self.fetches = 0
+        self.error = {}
+
+    def release(self, table_id):
+        if 'release' in self.error:
+            raise self.error['release']
+        return self.release_time
+
+    def fetch(self, table_id, folder):
+        if 'fetch' in self.error:
+            raise self.error['fetch']
+        self.fetches += 1
+        return f'{folder}/{self.release_time}.zip'
+
+
+def parse(zip_path):
+    # Stands in for the CSV parser: one row naming the zip it was given
+    return pd.DataFrame({'source': [zip_path.rsplit('/', 1)[-1]]})
+
+
+def test_same_release_is_served_from_cache(tmp_path):
+    downloader = FakeDownloader('2024-08-30T08:30')
+    first = load_table(TABLE_ID, parse, downloader, tmp_path)
+    second = load_table(TABLE_ID, parse, downloader, tmp_path)
+    assert downloader.fetches == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert read_manifest('36100104', tmp_path) == {'table': TABLE_ID, 'release': '2024-08-30T08:30', 'rows': 1,
+                                                   'fingerprint': None}
+
+
+def test_new_release_is_fetched(tmp_path):
+    downloader = FakeDownloader('2024-08-30T08:30')
+    load_table(TABLE_ID, parse, downloader, tmp_path)
+    downloader.release_time = '2024-11-29T08:30'
+    df = load_table(TABLE_ID, parse, downloader, tmp_path)
+    assert downloader.fetches == 2
+    assert df['source'].tolist() == ['2024-11-29T08:30.zip']
+    assert read_manifest('36100104', tmp_path)['release'] == '2024-11-29T08:30'
+
+
+def test_new_fingerprint_is_fetched(tmp_path):
+    downloader = FakeDownloader('2024-08-30T08:30')
+    load_table(TABLE_ID, parse, downloader, tmp_path, fingerprint='a')
+    load_table(TABLE_ID, parse, downloader, tmp_path, fingerprint='a')
+    assert downloader.fetches == 1
+    load_table(TABLE_ID, parse, downloader, tmp_path, fingerprint='b')
+    assert downloader.fetches == 2
+    assert read_manifest('36100104', tmp_path)['fingerprint'] == 'b'
+
+
+@pytest.mark.parametrize('failing', ['release', 'fetch'])
+def test_failure_serves_last_snapshot(tmp_path, failing):
+    downloader = FakeDownloader('2024-08-30T08:30')
+    load_table(TABLE_ID, parse, downloader, tmp_path)
+    downloader.release_time = '2024-11-29T08:30'
+    downloader.error[failing] = ConnectionError('StatsCan is down')
+    df = load_table(TABLE_ID, parse, downloader, tmp_path)
+    assert df['source'].tolist() == ['2024-08-30T08:30.zip']
+    assert read_manifest('36100104', tmp_path)['release'] == '2024-08-30T08:30'
+
+
+@pytest.mark.parametrize('failing', ['release', 'fetch'])
+def test_failure_without_snapshot_is_raised(tmp_path, failing):
+    downloader = FakeDownloader('2024-08-30T08:30')
+    downloader.error[failing] = ConnectionError('StatsCan is down')
+    with pytest.raises(ConnectionError):
+        load_table(TABLE_ID, parse, downloader, tmp_path)
+    assert read_manifest('36100104', tmp_path) is None
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from panel import Panel
+from vintages import list_vintages, load_vintage, record_vintage, revision_history
+
+
+def quarters(n):
+    return pd.period_range('2020Q1', periods=n, freq='Q').to_timestamp().to_numpy()
+
+
+def test_vintages_round_trip_through_deltas(tmp_path):
+    dates = quarters(6)
+    values = np.arange(12, dtype='float64').reshape(6, 2)
+    record_vintage('gdp', Panel(dates[:5], ['A', 'B'], values[:5], vintage='2024-01'), tmp_path)
+    revised = values.copy()
+    revised[2, 1] = 99.0
+    record_vintage('gdp', Panel(dates, ['A', 'B'], revised, vintage='2024-02'), tmp_path)
+    assert list_vintages('gdp', tmp_path) == ['2024-01', '2024-02']
+    np.testing.assert_array_equal(load_vintage('gdp', '2024-01', tmp_path).values, values[:5])
+    np.testing.assert_array_equal(load_vintage('gdp', '2024-02', tmp_path).values, revised)
+
+
+def test_vintages_keep_their_own_components(tmp_path):
+    dates = quarters(4)
+    record_vintage('gdp', Panel(dates, ['A', 'B'], np.ones((4, 2)), vintage='2024-01'), tmp_path)
+    record_vintage('gdp', Panel(dates, ['A', 'B', 'C'], np.full((4, 3), 2.0), vintage='2024-02'), tmp_path)
+    record_vintage('gdp', Panel(dates, ['A', 'B', 'C'], np.full((4, 3), 3.0), vintage='2024-03'), tmp_path)
+    assert load_vintage('gdp', '2024-01', tmp_path).components == ['A', 'B']
+    assert load_vintage('gdp', '2024-03', tmp_path).components == ['A', 'B', 'C']
+
+    history = revision_history('gdp', tmp_path)
+    assert history['components'] == ['A', 'B', 'C']
+    assert history['values'].shape == (3, 4, 3)
+    np.testing.assert_array_equal(history['values'][0, :, :2], 1.0)
+    assert np.isnan(history['values'][0, :, 2]).all()
+    np.testing.assert_array_equal(history['values'][2], 3.0)
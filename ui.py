@@ -0,0 +1,35 @@
+import contextlib
+import functools
+
+import streamlit as st
+
+from instrumentation import in_rerun, rerun
+
+
+def fragment(name):
+    # A panel that reruns on its own when one of its widgets changes, without
+    # the banner, menu or the rest of the page (st.fragment, Streamlit 1.37+).
+    # A rerun of just the fragment is recorded under `name`; inside a full run
+    # it is part of the page's record.
+    def decorator(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            if in_rerun():
+                return fn(*args, **kwargs)
+            with rerun(name):
+                return fn(*args, **kwargs)
+        return st.fragment(body)
+    return decorator
+
+
+@contextlib.contextmanager
+def controls(key, live=True):
+    # Inputs of a panel. Live, every change reruns the panel; otherwise they
+    # sit in a form and a burst of changes is applied as one rerun on "Apply".
+    if live:
+        with st.container():
+            yield
+    else:
+        with st.form(key):
+            yield
+            st.form_submit_button("Apply")
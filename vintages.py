@@ -0,0 +1,174 @@
+import json
+import pathlib
+
+import numpy as np
+
+from config import CACHE_DIR
+from panel import Panel
+from snapshot import version_name
+from table_cache import _dump_json, _write_atomic
+
+
+# Every release of a table, stored as the cells that changed since the one
+# before it:
+#
+#   <root>/<name>/index.json      latest components and one entry per vintage,
+#                                 oldest first; checkpoints list their components
+#   <root>/<name>/<version>.npz   checkpoint: dates, values (the whole table)
+#                                 delta: new_dates, rows, cols, values (changed cells)
+#
+# A delta's rows index the date axis after new_dates are merged in. Loading a
+# vintage starts from the nearest checkpoint at or before it, so it never
+# replays more than CHECKPOINT_EVERY - 1 deltas. A change of components always
+# starts a checkpoint, so every delta has the components of the one before it.
+CHECKPOINT_EVERY = 12
+
+
+def _root(name, root):
+    return pathlib.Path(root or CACHE_DIR / 'vintages') / name
+
+
+def read_index(name, root=None):
+    path = _root(name, root) / 'index.json'
+    if not path.is_file():
+        return {'components': None, 'vintages': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_npz(path, arrays):
+    # Through a file object: given a name, numpy would append ".npz" to the
+    # temp file's
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+
+def _same(a, b):
+    # Cell-wise equality that treats two missing values as unchanged
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def _align(dates, values, axis):
+    # Rows of `values` (dated `dates`) placed on the sorted date axis `axis`,
+    # NaN where a date is absent
+    out = np.full((len(axis), values.shape[1]), np.nan)
+    out[np.searchsorted(axis, dates)] = values
+    return out
+
+
+def _last_checkpoint(entries, position=None):
+    # Position of the checkpoint at or before `position` (default: the last entry)
+    last = len(entries) - 1 if position is None else position
+    return max(i for i, e in enumerate(entries[:last + 1]) if e['checkpoint'])
+
+
+def _components(index, position):
+    # Components of the vintage at `position`; indexes written before
+    # checkpoints carried them only have the latest list
+    return index['vintages'][_last_checkpoint(index['vintages'], position)].get(
+        'components', index['components'])
+
+
+def record_vintage(name, panel, root=None):
+    # Add panel.vintage to the store unless it is already there. Returns True
+    # when a new vintage was written.
+    folder = _root(name, root)
+    index = read_index(name, root)
+    entries = index['vintages']
+    if any(e['release'] == panel.vintage for e in entries):
+        return False
+
+    folder.mkdir(parents=True, exist_ok=True)
+    filename = version_name(panel.vintage) + '.npz'
+    dates = np.asarray(panel.dates, dtype='datetime64[ns]')
+    values = np.asarray(panel.values, dtype='float64')
+    checkpoint = (not entries or index['components'] != list(panel.components)
+                  or len(entries) - _last_checkpoint(entries) >= CHECKPOINT_EVERY)
+    if checkpoint:
+        arrays = {'dates': dates, 'values': values}
+        cells = values.size
+    else:
+        prev_dates, prev_values = _reconstruct(folder, entries, len(entries) - 1)
+        axis = np.union1d(prev_dates, dates)
+        before, after = _align(prev_dates, prev_values, axis), _align(dates, values, axis)
+        rows, cols = np.nonzero(~_same(before, after))
+        new_dates = np.setdiff1d(dates, prev_dates)
+        arrays = {'new_dates': new_dates, 'rows': rows.astype('int32'), 'cols': cols.astype('int32'),
+                  'values': after[rows, cols]}
+        cells = len(rows)
+    _write_atomic(folder / filename, lambda tmp: _save_npz(tmp, arrays))
+
+    entry = {'release': panel.vintage, 'file': filename, 'checkpoint': checkpoint, 'cells': int(cells)}
+    if checkpoint:
+        entry['components'] = list(panel.components)
+    entries.append(entry)
+    index = {'components': list(panel.components), 'vintages': entries}
+    _write_atomic(folder / 'index.json', lambda tmp: _dump_json(index, tmp))
+    return True
+
+
+def _reconstruct(folder, entries, position):
+    # (dates, values) of the vintage at `position` in the index
+    start = _last_checkpoint(entries, position)
+    with np.load(folder / entries[start]['file']) as saved:
+        dates, values = saved['dates'], saved['values']
+    for entry in entries[start + 1:position + 1]:
+        with np.load(folder / entry['file']) as delta:
+            dates, values = _apply(dates, values, delta)
+    return dates, values
+
+
+def _apply(dates, values, delta):
+    # One stored delta on top of the vintage before it
+    axis = np.union1d(dates, delta['new_dates'])
+    values = _align(dates, values, axis)
+    values[delta['rows'], delta['cols']] = delta['values']
+    return axis, values
+
+
+def list_vintages(name, root=None):
+    return [e['release'] for e in read_index(name, root)['vintages']]
+
+
+def load_vintage(name, release, root=None):
+    # The table as published in `release`, as a Panel
+    index = read_index(name, root)
+    position = [e['release'] for e in index['vintages']].index(release)
+    dates, values = _reconstruct(_root(name, root), index['vintages'], position)
+    return Panel(dates, _components(index, position), values, vintage=release)
+
+
+def revision_history(name, root=None):
+    # Every vintage on one date axis and the latest components, replaying
+    # the deltas once in order:
+    # {'releases': [...], 'dates': (n,), 'components': [...],
+    #  'values': (vintages, n, components)} with NaN where a quarter or a
+    # component was not published in that vintage
+    index = read_index(name, root)
+    folder = _root(name, root)
+    entries = index['vintages']
+    components = index['components']
+    states = []
+    dates = values = names = None
+    for entry in entries:
+        with np.load(folder / entry['file']) as saved:
+            if entry['checkpoint']:
+                dates, values = saved['dates'], saved['values']
+                names = entry.get('components', components)
+            else:
+                dates, values = _apply(dates, values, saved)
+        states.append((dates, values, names))
+    if not states:
+        return None
+    axis = states[-1][0]
+    for d, _, _ in states[:-1]:
+        axis = np.union1d(axis, d)
+    stacked = np.full((len(states), len(axis), len(components)), np.nan)
+    for i, (d, v, names) in enumerate(states):
+        # columns by name, so a vintage with other components still lines up
+        shared = [(components.index(c), j) for j, c in enumerate(names) if c in components]
+        if shared:
+            to, frm = map(list, zip(*shared))
+            stacked[i][:, to] = _align(d, v, axis)[:, frm]
+    return {'releases': [e['release'] for e in entries], 'dates': axis, 'components': components,
+            'values': stacked}